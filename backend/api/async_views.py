@@ -0,0 +1,46 @@
+import asyncio
+import functools
+from concurrent.futures import ThreadPoolExecutor
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import close_old_connections
+from rest_framework.permissions import SAFE_METHODS
+
+ASYNC_READ_ROUTES = {
+    'tag-list', 'tag-detail',
+    'ingredient-list', 'ingredient-detail',
+    'recipe-list', 'recipe-detail',
+}
+
+read_executor = ThreadPoolExecutor(
+    max_workers=settings.ASYNC_READ_THREADS, thread_name_prefix='read-api')
+
+
+def run_read_view(view, request, args, kwargs):
+    close_old_connections()
+    try:
+        response = view(request, *args, **kwargs)
+        if hasattr(response, 'render'):
+            response.render()
+        return response
+    finally:
+        close_old_connections()
+
+
+def async_read_view(view):
+    @functools.wraps(view)
+    async def wrapper(request, *args, **kwargs):
+        if (request.method not in SAFE_METHODS
+                or getattr(request, 'profiling', False)):
+            return await sync_to_async(view)(request, *args, **kwargs)
+        return await asyncio.get_running_loop().run_in_executor(
+            read_executor, run_read_view, view, request, args, kwargs)
+    return wrapper
+
+
+def async_read_urls(urlpatterns):
+    for pattern in urlpatterns:
+        if pattern.name in ASYNC_READ_ROUTES:
+            pattern.callback = async_read_view(pattern.callback)
+    return urlpatterns
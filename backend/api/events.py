@@ -0,0 +1,184 @@
+import asyncio
+import json
+import logging
+from urllib.parse import parse_qs
+
+import psycopg2
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import close_old_connections, connections
+from psycopg2.extensions import ISOLATION_LEVEL_AUTOCOMMIT
+from rest_framework.authtoken.models import Token
+
+from users.models import Subscription
+
+logger = logging.getLogger(__name__)
+
+
+class RecipeEventListener:
+    def __init__(self):
+        self.queues = {}
+        self.author_ids = {}
+        self.started = False
+
+    def subscribe(self, queue, author_ids):
+        self.unsubscribe(queue)
+        self.author_ids[queue] = author_ids
+        for author_id in author_ids:
+            self.queues.setdefault(author_id, set()).add(queue)
+        if not self.started:
+            self.started = True
+            asyncio.get_running_loop().create_task(
+                self.listen()).add_done_callback(self.listener_done)
+
+    def unsubscribe(self, queue):
+        for author_id in self.author_ids.pop(queue, ()):
+            queues = self.queues.get(author_id)
+            if queues is None:
+                continue
+            queues.discard(queue)
+            if not queues:
+                del self.queues[author_id]
+
+    def dispatch(self, payload):
+        try:
+            event = json.loads(payload)
+        except ValueError:
+            return
+        for queue in self.queues.get(event.get('author'), ()):
+            try:
+                queue.put_nowait(event)
+            except asyncio.QueueFull:
+                pass
+
+    async def listen(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            connection = None
+            try:
+                connection = await loop.run_in_executor(
+                    None, lambda: psycopg2.connect(
+                        **connections['default'].get_connection_params()))
+                connection.set_isolation_level(ISOLATION_LEVEL_AUTOCOMMIT)
+                with connection.cursor() as cursor:
+                    cursor.execute(
+                        f'LISTEN {settings.RECIPE_EVENTS_CHANNEL}')
+                await self.read_notifies(loop, connection)
+            except psycopg2.Error:
+                logger.exception('Потеряно подключение к PostgreSQL')
+            finally:
+                if connection is not None:
+                    connection.close()
+            await asyncio.sleep(settings.EVENTS_RECONNECT_DELAY)
+
+    async def read_notifies(self, loop, connection):
+        closed = loop.create_future()
+
+        def read():
+            try:
+                connection.poll()
+            except psycopg2.Error:
+                if not closed.done():
+                    closed.set_result(None)
+                return
+            while connection.notifies:
+                self.dispatch(connection.notifies.pop(0).payload)
+
+        fileno = connection.fileno()
+        loop.add_reader(fileno, read)
+        try:
+            await closed
+        finally:
+            loop.remove_reader(fileno)
+
+    def listener_done(self, task):
+        self.started = False
+        if not task.cancelled() and task.exception() is not None:
+            logger.error('Подписка на события рецептов остановлена',
+                         exc_info=task.exception())
+
+
+listener = RecipeEventListener()
+
+
+@sync_to_async
+def get_user(token):
+    close_old_connections()
+    try:
+        return Token.objects.select_related('user').get(key=token).user
+    except Token.DoesNotExist:
+        return None
+
+
+@sync_to_async
+def get_author_ids(user):
+    close_old_connections()
+    return frozenset(Subscription.objects.filter(
+        subscriber=user).values_list('author_id', flat=True))
+
+
+async def wait_disconnect(receive):
+    while (await receive())['type'] != 'http.disconnect':
+        pass
+
+
+async def send_json(send, status, data):
+    await send({
+        'type': 'http.response.start',
+        'status': status,
+        'headers': [(b'content-type', b'application/json')],
+    })
+    await send({
+        'type': 'http.response.body',
+        'body': json.dumps(data, ensure_ascii=False).encode(),
+    })
+
+
+async def recipe_events(scope, receive, send):
+    if scope['method'] != 'GET':
+        await send_json(send, 405, {'detail': 'Метод не разрешен.'})
+        return
+    token = parse_qs(scope['query_string'].decode()).get('token', [''])[0]
+    user = await get_user(token) if token else None
+    if user is None or not user.is_active:
+        await send_json(
+            send, 401, {'detail': 'Недопустимый токен.'})
+        return
+    await send({
+        'type': 'http.response.start',
+        'status': 200,
+        'headers': [
+            (b'content-type', b'text/event-stream'),
+            (b'cache-control', b'no-cache'),
+            (b'x-accel-buffering', b'no'),
+        ],
+    })
+    queue = asyncio.Queue(settings.EVENTS_QUEUE_SIZE)
+    listener.subscribe(queue, await get_author_ids(user))
+    disconnected = asyncio.ensure_future(wait_disconnect(receive))
+    loop = asyncio.get_running_loop()
+    refresh_at = loop.time() + settings.EVENTS_SUBSCRIPTIONS_REFRESH
+    try:
+        while True:
+            event = asyncio.ensure_future(queue.get())
+            done, _ = await asyncio.wait(
+                {event, disconnected}, timeout=settings.EVENTS_HEARTBEAT,
+                return_when=asyncio.FIRST_COMPLETED)
+            if disconnected in done:
+                event.cancel()
+                break
+            if event in done:
+                data = json.dumps(event.result())
+                body = f'event: recipe\ndata: {data}\n\n'
+            else:
+                event.cancel()
+                body = ': ping\n\n'
+            await send({'type': 'http.response.body',
+                        'body': body.encode(), 'more_body': True})
+            if loop.time() >= refresh_at:
+                listener.subscribe(queue, await get_author_ids(user))
+                refresh_at = loop.time() + (
+                    settings.EVENTS_SUBSCRIPTIONS_REFRESH)
+    finally:
+        listener.unsubscribe(queue)
+        disconnected.cancel()
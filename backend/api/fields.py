@@ -0,0 +1,128 @@
+import re
+
+from django.conf import settings
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.core.files.uploadedfile import UploadedFile
+from drf_extra_fields.fields import Base64ImageField
+from rest_framework import serializers
+from rest_framework.relations import MANY_RELATION_KWARGS
+
+from uploads.models import ChunkedUpload
+
+UPLOAD_TOKEN_RE = re.compile(
+    r'[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}')
+
+
+class BulkPrimaryKeyRelatedField(serializers.PrimaryKeyRelatedField):
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.prefetched = None
+
+    @classmethod
+    def many_init(cls, *args, **kwargs):
+        list_kwargs = {'child_relation': cls(*args, **kwargs)}
+        for key in kwargs:
+            if key in MANY_RELATION_KWARGS:
+                list_kwargs[key] = kwargs[key]
+        return BulkManyRelatedField(**list_kwargs)
+
+    def coerce_pk(self, data):
+        if self.pk_field is not None:
+            data = self.pk_field.to_internal_value(data)
+        if isinstance(data, bool):
+            raise TypeError
+        return self.get_queryset().model._meta.pk.to_python(data)
+
+    def prefetch(self, values):
+        pks = set()
+        for value in values:
+            try:
+                pks.add(self.coerce_pk(value))
+            except (TypeError, ValueError, DjangoValidationError,
+                    serializers.ValidationError):
+                continue
+        self.prefetched = self.get_queryset().in_bulk(pks)
+
+    def to_internal_value(self, data):
+        if self.prefetched is None:
+            return super().to_internal_value(data)
+        try:
+            pk = self.coerce_pk(data)
+        except (TypeError, ValueError, DjangoValidationError):
+            self.fail('incorrect_type', data_type=type(data).__name__)
+        if pk not in self.prefetched:
+            self.fail('does_not_exist', pk_value=data)
+        return self.prefetched[pk]
+
+
+class BulkManyRelatedField(serializers.ManyRelatedField):
+    def to_internal_value(self, data):
+        if not isinstance(data, str) and hasattr(data, '__iter__'):
+            self.child_relation.prefetch(data)
+        return super().to_internal_value(data)
+
+
+class CompletedUploadFile(UploadedFile):
+    def __init__(self, upload):
+        self._file = None
+        super().__init__(None, upload.filename, None, upload.size)
+        self.upload = upload
+
+    @property
+    def file(self):
+        if self._file is None:
+            self._file = open(self.upload.path, 'rb')
+        return self._file
+
+    @file.setter
+    def file(self, file):
+        self._file = file
+
+    @property
+    def closed(self):
+        return self._file is None or self._file.closed
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def temporary_file_path(self):
+        return self.upload.path
+
+
+class RecipeImageField(Base64ImageField):
+    default_error_messages = {
+        'too_large': 'Размер изображения не должен превышать {max_size} байт.',
+        'upload_not_found': 'Загрузка не найдена или еще не завершена.',
+    }
+
+    def check_size(self, size):
+        if size > settings.RECIPE_IMAGE_MAX_SIZE:
+            self.fail('too_large', max_size=settings.RECIPE_IMAGE_MAX_SIZE)
+
+    def to_internal_value(self, data):
+        if isinstance(data, UploadedFile):
+            self.check_size(data.size)
+            return serializers.ImageField.to_internal_value(self, data)
+        if isinstance(data, str) and UPLOAD_TOKEN_RE.fullmatch(data):
+            upload_file = CompletedUploadFile(self.get_upload(data))
+            try:
+                return serializers.ImageField.to_internal_value(
+                    self, upload_file)
+            finally:
+                upload_file.close()
+        if isinstance(data, str):
+            self.check_size(len(data) * 3 // 4)
+        return super().to_internal_value(data)
+
+    def get_upload(self, token):
+        request = self.context.get('request')
+        if request is None or request.user.is_anonymous:
+            self.fail('upload_not_found')
+        upload = ChunkedUpload.objects.filter(
+            id=token, user=request.user,
+            completed_at__isnull=False).first()
+        if upload is None:
+            self.fail('upload_not_found')
+        return upload
@@ -1,6 +1,8 @@
 import django_filters
+from django.db.models import Exists, OuterRef
 
-from recipes.models import Ingredient, Recipe, Tag
+from recipes.models import (FavoriteRecipe, Ingredient, Recipe, ShoppingCart,
+                            Tag)
 
 
 class IngredientFilter(django_filters.FilterSet):
@@ -22,7 +24,17 @@ class RecipeFilter(django_filters.FilterSet):
     tags = django_filters.ModelMultipleChoiceFilter(
         field_name='tags__slug',
         to_field_name='slug',
-        queryset=Tag.objects.all()
+        queryset=Tag.objects.all(),
+        method='filter_tags'
+    )
+    tags_match = django_filters.ChoiceFilter(
+        choices=(('any', 'Любой из тегов'), ('all', 'Все теги')),
+        method='skip_filter'
+    )
+    ordering = django_filters.ChoiceFilter(
+        choices=(('popular', 'Популярные'),
+                 ('trending', 'Набирающие популярность')),
+        method='order_recipes'
     )
     is_favorited = django_filters.BooleanFilter(method='get_favorites')
     is_in_shopping_cart = django_filters.BooleanFilter(
@@ -30,14 +42,33 @@ class RecipeFilter(django_filters.FilterSet):
 
     class Meta:
         model = Recipe
-        fields = ('is_favorited', 'is_in_shopping_cart', 'author', 'tags')
+        fields = ('is_favorited', 'is_in_shopping_cart', 'author', 'tags',
+                  'tags_match', 'ordering')
+
+    def filter_tags(self, queryset, name, value):
+        if not value:
+            return queryset
+        tag_ids = [tag.id for tag in value]
+        if self.form.cleaned_data.get('tags_match') == 'all':
+            return queryset.filter(tag_ids__contains=tag_ids)
+        return queryset.filter(tag_ids__overlap=tag_ids)
+
+    def skip_filter(self, queryset, name, value):
+        return queryset
+
+    def order_recipes(self, queryset, name, value):
+        if value == 'trending':
+            return queryset.order_by('-trending_score', '-id')
+        return queryset.order_by('-popularity_score', '-id')
 
     def get_favorites(self, queryset, name, value):
         if value:
-            return queryset.filter(favorites__user=self.request.user)
+            return queryset.filter(Exists(FavoriteRecipe.objects.filter(
+                user=self.request.user, recipe=OuterRef('pk'))))
         return queryset
 
     def get_in_shopping_cart(self, queryset, name, value):
         if value:
-            return queryset.filter(shopping_cart__user=self.request.user)
+            return queryset.filter(Exists(ShoppingCart.objects.filter(
+                user=self.request.user, recipe=OuterRef('pk'))))
         return queryset
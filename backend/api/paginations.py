@@ -1,6 +1,119 @@
-from rest_framework.pagination import PageNumberPagination
+import hashlib
+import json
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import EmptyResultSet
+from django.core.paginator import (EmptyPage, Page, PageNotAnInteger,
+                                   Paginator)
+from django.db import connections
+from django.db.models import QuerySet
+from django.utils.functional import cached_property
+from rest_framework.pagination import CursorPagination, PageNumberPagination
+from rest_framework.response import Response
 
 
 class LimitPagination(PageNumberPagination):
     page_size_query_param = 'limit'
     page_size = 20
+
+
+class EstimatedCountPaginator(Paginator):
+    @cached_property
+    def counted(self):
+        if not isinstance(self.object_list, QuerySet):
+            return super().count, True
+        using = self.object_list.db
+        query = self.object_list.order_by().values('pk').query
+        try:
+            sql, params = query.get_compiler(using).as_sql()
+        except EmptyResultSet:
+            return 0, True
+        key = 'page_count_' + hashlib.md5(
+            f'{sql}{params!r}'.encode()).hexdigest()
+        counted = cache.get(key)
+        if counted is None:
+            estimate = self.estimate(using, sql, params)
+            if (estimate is not None
+                    and estimate > settings.PAGINATION_ESTIMATE_THRESHOLD):
+                counted = (estimate, False)
+            else:
+                counted = (super().count, True)
+            cache.set(key, counted, settings.PAGINATION_COUNT_TTL)
+        return counted
+
+    def estimate(self, using, sql, params):
+        connection = connections[using]
+        if connection.vendor != 'postgresql':
+            return None
+        with connection.cursor() as cursor:
+            cursor.execute(f'EXPLAIN (FORMAT JSON) {sql}', params)
+            plan = cursor.fetchone()[0]
+        if isinstance(plan, str):
+            plan = json.loads(plan)
+        return int(plan[0]['Plan']['Plan Rows'])
+
+    @cached_property
+    def count(self):
+        return self.counted[0]
+
+    @property
+    def count_exact(self):
+        return self.counted[1]
+
+    def validate_number(self, number):
+        if self.count_exact:
+            return super().validate_number(number)
+        try:
+            number = int(number)
+        except (TypeError, ValueError):
+            raise PageNotAnInteger('Номер страницы должен быть целым числом')
+        if number < 1:
+            raise EmptyPage('Номер страницы меньше 1')
+        return number
+
+    def page(self, number):
+        number = self.validate_number(number)
+        if self.count_exact:
+            return super().page(number)
+        bottom = (number - 1) * self.per_page
+        object_list = list(
+            self.object_list[bottom:bottom + self.per_page + 1])
+        return EstimatedPage(object_list[:self.per_page], number, self,
+                             len(object_list) > self.per_page)
+
+
+class EstimatedPage(Page):
+    def __init__(self, object_list, number, paginator, more):
+        super().__init__(object_list, number, paginator)
+        self.more = more
+
+    def has_next(self):
+        return self.more
+
+
+class EstimatedCountPagination(LimitPagination):
+    django_paginator_class = EstimatedCountPaginator
+
+    def get_paginated_response(self, data):
+        return Response({
+            'count': self.page.paginator.count,
+            'count_exact': self.page.paginator.count_exact,
+            'next': self.get_next_link(),
+            'previous': self.get_previous_link(),
+            'results': data,
+        })
+
+    def get_paginated_response_schema(self, schema):
+        response_schema = super().get_paginated_response_schema(schema)
+        response_schema['properties']['count_exact'] = {
+            'type': 'boolean',
+        }
+        return response_schema
+
+
+class UserCursorPagination(CursorPagination):
+    page_size_query_param = 'limit'
+    page_size = 20
+    max_page_size = 100
+    ordering = ('-date_joined', '-id')
@@ -1,11 +1,19 @@
-from django.shortcuts import get_object_or_404
+import os
+
+from django.conf import settings
+from django.db import transaction
 from djoser.serializers import UserCreateSerializer, UserSerializer
 from drf_extra_fields.fields import Base64ImageField
 from rest_framework import serializers
 from rest_framework.exceptions import ValidationError
 
-from recipes.models import (FavoriteRecipe, Ingredient, Recipe,
-                            RecipeIngredient, ShoppingCart, Tag)
+from api.fields import BulkPrimaryKeyRelatedField, RecipeImageField
+from recipes.documents import refresh_documents
+from recipes.models import (FavoriteRecipe, Ingredient, MealPlanEntry,
+                            Recipe, RecipeIngredient, ShoppingCart, Tag)
+from recipes.search import ingredient_index
+from recipes.tasks import delete_images_later
+from uploads.models import ChunkedUpload
 from users.models import Subscription
 
 
@@ -33,6 +41,8 @@ class UserInfoSerializer(UserSerializer):
         request = self.context.get('request')
         if request is None or request.user.is_anonymous:
             return False
+        if hasattr(obj, 'is_subscribed'):
+            return obj.is_subscribed
         return Subscription.objects.filter(
             subscriber=request.user, author=obj).exists()
 
@@ -69,16 +79,56 @@ class RecipeSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = Recipe
-        exclude = ['created_at']
+        exclude = ['created_at', 'tag_ids', 'document', 'popularity_score',
+                   'trending_score']
+
+    def to_representation(self, instance):
+        if not instance.document:
+            return super().to_representation(instance)
+        document = instance.document
+        request = self.context.get('request')
+        image = document['image']
+        if image and request is not None:
+            image = request.build_absolute_uri(image)
+        author = document['author']
+        if author is not None:
+            author = {
+                **author,
+                'is_subscribed': self.get_author_is_subscribed(instance)
+            }
+        return {
+            'id': document['id'],
+            'author': author,
+            'tags': document['tags'],
+            'ingredients': document['ingredients'],
+            'is_favorited': self.get_is_favorited(instance),
+            'is_in_shopping_cart': self.get_is_in_shopping_cart(instance),
+            'name': document['name'],
+            'image': image,
+            'text': document['text'],
+            'cooking_time': document['cooking_time'],
+        }
 
     def get_ingredients(self, obj):
         return RecipeIngredientSerializer(
-            RecipeIngredient.objects.filter(recipe=obj), many=True).data
+            RecipeIngredient.objects.filter(recipe=obj).select_related(
+                'ingredient'), many=True).data
+
+    def get_author_is_subscribed(self, obj):
+        request = self.context.get('request')
+        if request is None or request.user.is_anonymous:
+            return False
+        if hasattr(obj, 'author_is_subscribed'):
+            return obj.author_is_subscribed
+        return Subscription.objects.filter(
+            subscriber=request.user, author_id=obj.author_id).exists()
 
     def get_is_favorited(self, obj):
         request = self.context.get('request')
         if request is None or request.user.is_anonymous:
             return False
+        if hasattr(obj, 'is_favorited'):
+            return obj.is_favorited
         return FavoriteRecipe.objects.filter(
             user=request.user, recipe=obj).exists()
 
@@ -86,50 +136,73 @@ class RecipeSerializer(serializers.ModelSerializer):
         request = self.context.get('request')
         if request is None or request.user.is_anonymous:
             return False
+        if hasattr(obj, 'is_in_shopping_cart'):
+            return obj.is_in_shopping_cart
         return ShoppingCart.objects.filter(
             user=request.user, recipe=obj).exists()
 
 
+class IngredientRecipeListSerializer(serializers.ListSerializer):
+    def to_internal_value(self, data):
+        if isinstance(data, list):
+            self.child.fields['id'].prefetch(
+                item['id'] for item in data
+                if isinstance(item, dict) and 'id' in item)
+        return super().to_internal_value(data)
+
+
 class IngredientRecipeCreationSerializer(serializers.ModelSerializer):
-    id = serializers.PrimaryKeyRelatedField(queryset=Ingredient.objects.all())
+    id = BulkPrimaryKeyRelatedField(queryset=Ingredient.objects.all())
     amount = serializers.IntegerField()
 
     class Meta:
         model = RecipeIngredient
         fields = ['id', 'amount']
+        list_serializer_class = IngredientRecipeListSerializer
 
 
 class RecipeCreationSerializer(serializers.ModelSerializer):
     ingredients = IngredientRecipeCreationSerializer(many=True)
-    tags = serializers.PrimaryKeyRelatedField(
+    tags = BulkPrimaryKeyRelatedField(
         queryset=Tag.objects.all(), many=True)
-    image = Base64ImageField()
+    image = RecipeImageField()
     author = UserInfoSerializer(read_only=True)
     cooking_time = serializers.IntegerField()
 
     def set_tags_and_ingredients(self, recipe, tags, ingredients):
-        for tag in tags:
-            recipe.tags.add(get_object_or_404(Tag, id=tag.id))
-        for ingredient in ingredients:
-            RecipeIngredient.objects.create(
-                recipe=recipe, amount=ingredient['amount'],
-                ingredient=ingredient['id'])
+        recipe.tags.set(tags)
+        RecipeIngredient.objects.bulk_create(
+            RecipeIngredient(recipe=recipe, amount=ingredient['amount'],
+                             ingredient=ingredient['id'])
+            for ingredient in ingredients)
 
     class Meta:
         model = Recipe
         fields = ['id', 'tags', 'author', 'ingredients',
                   'name', 'image', 'text', 'cooking_time']
 
+    def release_upload(self, image):
+        upload = getattr(image, 'upload', None)
+        if upload is not None:
+            image.close()
+            upload.delete()
+
+    @transaction.atomic
     def create(self, validated_data):
         tags_data = validated_data.pop('tags')
         ingredients_data = validated_data.pop('ingredients')
         recipe = Recipe.objects.create(**validated_data)
+        self.release_upload(validated_data['image'])
         self.set_tags_and_ingredients(recipe, tags_data, ingredients_data)
+        refresh_documents([recipe.id])
+        recipe.refresh_from_db(fields=['document', 'tag_ids'])
+        transaction.on_commit(lambda: ingredient_index.update_recipe(recipe))
         return recipe
 
     def to_representation(self, instance):
         return RecipeSerializer(instance).data
 
+    @transaction.atomic
     def update(self, instance, validated_data):
         instance.tags.clear()
         instance.ingredients.clear()
@@ -138,10 +211,18 @@ class RecipeCreationSerializer(serializers.ModelSerializer):
         self.set_tags_and_ingredients(instance, tags_data, ingredients_data)
         instance.name = validated_data['name']
         instance.text = validated_data['text']
+        old_image = instance.image.name
         if 'image' in validated_data:
             instance.image = validated_data['image']
         instance.cooking_time = validated_data['cooking_time']
-        instance.save()
+        instance.save(update_fields=['name', 'text', 'image', 'cooking_time'])
+        self.release_upload(validated_data.get('image'))
+        if instance.image.name != old_image:
+            delete_images_later([old_image])
+        refresh_documents([instance.id])
+        instance.refresh_from_db(fields=['document', 'tag_ids'])
+        transaction.on_commit(
+            lambda: ingredient_index.update_recipe(instance))
         return instance
 
     def validate_cooking_time(self, value):
@@ -172,6 +253,68 @@ class RecipeShortInfoSerializer(serializers.ModelSerializer):
         fields = ['id', 'name', 'image', 'cooking_time']
 
 
+class WhatToCookSerializer(serializers.Serializer):
+    ingredients = serializers.ListField(
+        child=serializers.IntegerField(min_value=1), allow_empty=False)
+    tags = serializers.ListField(
+        child=serializers.SlugField(), required=False)
+    max_cooking_time = serializers.IntegerField(min_value=1, required=False)
+
+
+class MealPlanEntrySerializer(serializers.ModelSerializer):
+    class Meta:
+        model = MealPlanEntry
+        fields = ['id', 'recipe', 'date', 'servings']
+
+    def to_representation(self, instance):
+        data = super().to_representation(instance)
+        data['recipe'] = RecipeShortInfoSerializer(instance.recipe).data
+        return data
+
+
+class MealPlanRangeSerializer(serializers.Serializer):
+    start = serializers.DateField()
+    end = serializers.DateField()
+
+    def validate(self, data):
+        if data['end'] < data['start']:
+            raise ValidationError(
+                'Дата окончания не может быть раньше даты начала!')
+        if (data['end'] - data['start']).days >= (
+                settings.MEAL_PLAN_MAX_DAYS):
+            raise ValidationError(
+                f'Период не может быть длиннее '
+                f'{settings.MEAL_PLAN_MAX_DAYS} дней!')
+        return data
+
+
+class ChunkedUploadSerializer(serializers.ModelSerializer):
+    completed = serializers.SerializerMethodField()
+
+    class Meta:
+        model = ChunkedUpload
+        fields = ['id', 'filename', 'size', 'offset', 'completed']
+        read_only_fields = ['id', 'offset']
+
+    def get_completed(self, obj):
+        return obj.completed_at is not None
+
+    def validate_size(self, value):
+        if value <= 0:
+            raise ValidationError('Размер файла должен быть больше нуля.')
+        if value > settings.RECIPE_IMAGE_MAX_SIZE:
+            raise ValidationError(
+                'Размер изображения не должен превышать '
+                f'{settings.RECIPE_IMAGE_MAX_SIZE} байт.')
+        return value
+
+    def validate_filename(self, value):
+        extension = os.path.splitext(value)[1].lower().lstrip('.')
+        if extension not in RecipeImageField.ALLOWED_TYPES:
+            raise ValidationError('Недопустимый тип изображения.')
+        return value
+
+
 class UserSubscriptionSerializer(UserInfoSerializer):
     recipes = serializers.SerializerMethodField()
     recipes_count = serializers.SerializerMethodField()
@@ -189,9 +332,14 @@ class UserSubscriptionSerializer(UserInfoSerializer):
         )
 
     def get_recipes_count(self, obj):
+        if hasattr(obj, 'recipes_count'):
+            return obj.recipes_count
         return obj.recipes.filter(author=obj).count()
 
     def get_recipes(self, obj):
+        if hasattr(obj, 'prefetched_recipes'):
+            return RecipeShortInfoSerializer(
+                obj.prefetched_recipes, many=True).data
         recipes = Recipe.objects.filter(author=obj).order_by(
             '-created_at')
         recipes_limit = self.context['request'].query_params.get(
@@ -0,0 +1,39 @@
+import numpy as np
+from django.http.response import HttpResponse
+
+
+def aggregate_ingredients(rows):
+    rows = list(rows)
+    if not rows:
+        return []
+    ids, names, units, amounts, multipliers = zip(*rows)
+    ingredient_ids, positions, inverse = np.unique(
+        np.array(ids, dtype=np.int64), return_index=True,
+        return_inverse=True)
+    totals = np.bincount(
+        inverse, weights=np.array(amounts, dtype=np.float64)
+        * np.array(multipliers, dtype=np.float64))
+    items = [
+        {
+            'id': int(ingredient_id),
+            'name': names[position],
+            'measurement_unit': units[position],
+            'amount': int(total) if total.is_integer() else float(total),
+        }
+        for ingredient_id, position, total in zip(
+            ingredient_ids, positions, totals)
+    ]
+    items.sort(key=lambda item: (item['name'], item['measurement_unit']))
+    return items
+
+
+def shopping_list_response(items, filename='purchase_list.txt'):
+    purchase_list = [
+        f"{item['name']} ({item['measurement_unit']}) — {item['amount']}\n"
+        for item in items
+    ]
+    response = HttpResponse(purchase_list,
+                            'Content-Type: application/txt')
+    response['Content-Disposition'] = (
+        f'attachment; filename="{filename}"')
+    return response
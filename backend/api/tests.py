@@ -0,0 +1,261 @@
+import os
+import tempfile
+import traceback
+from base64 import b64encode
+from collections import defaultdict
+from io import BytesIO
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import connection, transaction
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from PIL import Image
+from rest_framework.test import APIClient
+
+from recipes.documents import refresh_documents
+from recipes.models import (FavoriteRecipe, Ingredient, MealPlanEntry,
+                            Recipe, RecipeIngredient, ShoppingCart, Tag)
+from recipes.search import ingredient_index
+from recipes.signals import sync_tag_ids
+from users.models import Subscription
+
+User = get_user_model()
+
+SMALL_SIZE = 5
+LARGE_SIZE = 15
+RECIPES_PER_AUTHOR = 3
+INGREDIENTS_PER_RECIPE = 3
+
+
+def image_bytes():
+    buffer = BytesIO()
+    Image.new('RGB', (1, 1)).save(buffer, 'PNG')
+    return buffer.getvalue()
+
+
+IMAGE = image_bytes()
+IMAGE_BASE64 = 'data:image/png;base64,' + b64encode(IMAGE).decode()
+UPLOAD_DATA = {'data': {'filename': 'budget.png', 'size': len(IMAGE)},
+               'format': 'json'}
+
+
+def recipe_data(values, image):
+    return {'data': {
+        'tags': values['tag_ids'],
+        'ingredients': [{'id': ingredient_id, 'amount': 10}
+                        for ingredient_id in values['ingredient_ids']],
+        'name': 'budget', 'image': image, 'text': 'text',
+        'cooking_time': 10}, 'format': 'json'}
+
+
+# (название, метод, адрес, клиент, бюджет запросов[, данные запроса]);
+# запросы выполняются по порядку, поэтому удаление идет после
+# добавления, а {created} - id из ответа на последний POST. Списки
+# с EstimatedCountPagination тратят запрос на EXPLAIN
+BUDGETS = (
+    ('recipes: список, аноним', 'get', '/api/recipes/?limit=1000',
+     'anonymous', 3),
+    ('recipes: список', 'get', '/api/recipes/?limit=1000', 'viewer', 3),
+    ('recipes: рецепт, аноним', 'get', '/api/recipes/{recipe}/',
+     'anonymous', 1),
+    ('recipes: рецепт', 'get', '/api/recipes/{recipe}/', 'viewer', 1),
+    ('recipes: is_favorited', 'get',
+     '/api/recipes/?limit=1000&is_favorited=1', 'viewer', 3),
+    ('recipes: is_in_shopping_cart', 'get',
+     '/api/recipes/?limit=1000&is_in_shopping_cart=1', 'viewer', 3),
+    ('recipes: tags', 'get', '/api/recipes/?limit=1000&tags={tag}',
+     'viewer', 4),
+    ('recipes: tags_match=all', 'get',
+     '/api/recipes/?limit=1000&tags={tag}&tags_match=all', 'viewer', 4),
+    ('recipes: author', 'get', '/api/recipes/?limit=1000&author={author}',
+     'viewer', 4),
+    ('recipes: ordering', 'get', '/api/recipes/?limit=1000&ordering=popular',
+     'viewer', 3),
+    ('recipes: что приготовить', 'get',
+     '/api/recipes/what-to-cook/?limit=1000&ingredients={ingredient}',
+     'anonymous', 1),
+    ('recipes: список покупок', 'get', '/api/recipes/download_shopping_cart/',
+     'viewer', 1),
+    ('recipes: выгрузка', 'get', '/api/recipes/export/', 'admin', 4),
+    ('recipes: добавить в избранное', 'get',
+     '/api/recipes/{new_recipe}/favorite/', 'viewer', 4),
+    ('recipes: удалить из избранного', 'delete',
+     '/api/recipes/{new_recipe}/favorite/', 'viewer', 5),
+    ('recipes: добавить в список покупок', 'get',
+     '/api/recipes/{new_recipe}/shopping_cart/', 'viewer', 4),
+    ('recipes: удалить из списка покупок', 'delete',
+     '/api/recipes/{new_recipe}/shopping_cart/', 'viewer', 5),
+    ('uploads: создать', 'post', '/api/uploads/', 'viewer', 1,
+     lambda values: UPLOAD_DATA),
+    ('uploads: часть файла', 'patch', '/api/uploads/{created}/', 'viewer', 4,
+     lambda values: {'data': IMAGE, 'HTTP_UPLOAD_OFFSET': '0',
+                     'content_type': 'application/offset+octet-stream'}),
+    ('uploads: загрузка', 'get', '/api/uploads/{created}/', 'viewer', 1),
+    ('recipes: создать', 'post', '/api/recipes/', 'viewer', 18,
+     lambda values: recipe_data(values, values['created'])),
+    ('recipes: изменить', 'put', '/api/recipes/{created}/', 'viewer', 21,
+     lambda values: recipe_data(values, IMAGE_BASE64)),
+    ('recipes: удалить', 'delete', '/api/recipes/{created}/', 'viewer', 4),
+    ('uploads: создать для удаления', 'post', '/api/uploads/', 'viewer', 1,
+     lambda values: UPLOAD_DATA),
+    ('uploads: удалить', 'delete', '/api/uploads/{created}/', 'viewer', 2),
+    ('meal-plan: добавить', 'post', '/api/meal-plan/', 'viewer', 2,
+     lambda values: {'data': {'recipe': values['recipe'], 'servings': 2,
+                              'date': timezone.localdate()},
+                     'format': 'json'}),
+    ('meal-plan: изменить', 'patch', '/api/meal-plan/{created}/', 'viewer', 2,
+     lambda values: {'data': {'servings': 3}, 'format': 'json'}),
+    ('meal-plan: удалить', 'delete', '/api/meal-plan/{created}/', 'viewer', 2),
+    ('meal-plan: список', 'get', '/api/meal-plan/', 'viewer', 1),
+    ('meal-plan: ингредиенты', 'get', '/api/meal-plan/ingredients/',
+     'viewer', 1),
+    ('meal-plan: выгрузка', 'get', '/api/meal-plan/download/', 'viewer', 1),
+    ('tags: список', 'get', '/api/tags/', 'anonymous', 1),
+    ('ingredients: поиск', 'get', '/api/ingredients/?name=ingr',
+     'anonymous', 1),
+    ('users: список', 'get', '/api/users/?limit=1000', 'viewer', 1),
+    ('users: профиль', 'get', '/api/users/{author}/', 'viewer', 1),
+    ('users: me', 'get', '/api/users/me/', 'viewer', 1),
+    ('users: подписки', 'get',
+     '/api/users/subscriptions/?limit=1000&recipes_limit=2', 'viewer', 4),
+    ('users: подписаться', 'get', '/api/users/{new_author}/subscribe/',
+     'viewer', 6),
+    ('users: отписаться', 'delete', '/api/users/{new_author}/subscribe/',
+     'viewer', 3),
+)
+
+
+class QueryRecorder:
+    def __init__(self):
+        self.queries = []
+
+    def __call__(self, execute, sql, params, many, context):
+        self.queries.append((self.call_site(), sql))
+        return execute(sql, params, many, context)
+
+    def call_site(self):
+        project = str(settings.BASE_DIR)
+        for frame in reversed(traceback.extract_stack()[:-2]):
+            if (frame.filename.startswith(project)
+                    and __file__ != frame.filename):
+                return f'{frame.filename}:{frame.lineno} ({frame.name})'
+        return 'неизвестно'
+
+
+def seed(size):
+    tags = Tag.objects.bulk_create(
+        Tag(name=f'tag {number}', color='#000000', slug=f'tag-{number}')
+        for number in range(3))
+    ingredients = Ingredient.objects.bulk_create(
+        Ingredient(name=f'ingredient {number}', measurement_unit='г')
+        for number in range(size * 2))
+    viewer = User.objects.create(
+        email='budget@example.com', username='budget',
+        first_name='budget', last_name='budget')
+    admin = User.objects.create(
+        email='admin@example.com', username='admin',
+        first_name='admin', last_name='admin', is_staff=True)
+    authors = User.objects.bulk_create(
+        User(email=f'author{number}@example.com',
+             username=f'author{number}', first_name='author',
+             last_name=f'{number}')
+        for number in range(size + 1))
+    recipes = Recipe.objects.bulk_create(
+        Recipe(author=author, name=f'{author.username} {number}',
+               image='recipes/images/budget.jpg', text='text',
+               cooking_time=number + 1)
+        for author in authors for number in range(RECIPES_PER_AUTHOR))
+    Recipe.tags.through.objects.bulk_create(
+        Recipe.tags.through(recipe=recipe, tag=tag)
+        for recipe in recipes for tag in tags[:2])
+    RecipeIngredient.objects.bulk_create(
+        RecipeIngredient(
+            recipe=recipe, amount=number + 1,
+            ingredient=ingredients[(index + number) % len(ingredients)])
+        for index, recipe in enumerate(recipes)
+        for number in range(INGREDIENTS_PER_RECIPE))
+    recipe_ids = [recipe.id for recipe in recipes]
+    sync_tag_ids(recipe_ids)
+    refresh_documents(recipe_ids)
+    # Рецепты последнего автора не добавлены в избранное и список
+    # покупок, а на него самого нет подписки
+    new_author, authors = authors[-1], authors[:-1]
+    new_recipe, recipes = recipes[-1], recipes[:-RECIPES_PER_AUTHOR]
+    FavoriteRecipe.objects.bulk_create(
+        FavoriteRecipe(user=viewer, recipe=recipe) for recipe in recipes)
+    ShoppingCart.objects.bulk_create(
+        ShoppingCart(user=viewer, recipe=recipe) for recipe in recipes)
+    MealPlanEntry.objects.bulk_create(
+        MealPlanEntry(user=viewer, recipe=recipe, servings=2,
+                      date=timezone.localdate())
+        for recipe in recipes)
+    Subscription.objects.bulk_create(
+        Subscription(subscriber=viewer, author=author)
+        for author in authors)
+    ingredient_index.rebuild()
+    return {'viewer': viewer, 'admin': admin}, {
+        'recipe': recipes[0].id, 'tag': tags[0].slug,
+        'author': authors[0].id, 'ingredient': ingredients[0].id,
+        'new_recipe': new_recipe.id, 'new_author': new_author.id,
+        'tag_ids': [tag.id for tag in tags[:2]],
+        'ingredient_ids': [ingredient.id for ingredient
+                           in ingredients[:INGREDIENTS_PER_RECIPE]]}
+
+
+@override_settings(CACHES={'default': {
+    'BACKEND': 'django.core.cache.backends.dummy.DummyCache'}})
+class QueryBudgetTests(TestCase):
+    def measure(self, size):
+        results = {}
+        with transaction.atomic():
+            users, values = seed(size)
+            clients = {'anonymous': APIClient()}
+            for name, user in users.items():
+                clients[name] = APIClient()
+                clients[name].force_authenticate(user)
+            for name, method, url, client, budget, *data in BUDGETS:
+                kwargs = data[0](values) if data else {}
+                recorder = QueryRecorder()
+                with CaptureQueriesContext(connection) as queries, \
+                        connection.execute_wrapper(recorder):
+                    response = getattr(clients[client], method)(
+                        url.format(**values), **kwargs)
+                    if response.streaming:
+                        b''.join(response.streaming_content)
+                if method == 'post' and response.status_code == 201:
+                    values['created'] = response.data['id']
+                results[name] = (
+                    response.status_code, len(queries), recorder.queries)
+            transaction.set_rollback(True)
+        return results
+
+    def format_queries(self, queries):
+        sites = defaultdict(list)
+        for site, sql in queries:
+            sites[site].append(sql)
+        lines = []
+        for site, statements in sorted(
+                sites.items(), key=lambda item: -len(item[1])):
+            lines.append(f'{len(statements)} x {site}')
+            lines.extend(f'    {sql}' for sql in dict.fromkeys(statements))
+        return '\n'.join(lines)
+
+    def test_query_budgets(self):
+        self.addCleanup(ingredient_index.stop_listener)
+        with tempfile.TemporaryDirectory() as root, self.settings(
+                MEDIA_ROOT=root,
+                UPLOAD_TEMP_ROOT=os.path.join(root, 'uploads')):
+            small = self.measure(SMALL_SIZE)
+            large = self.measure(LARGE_SIZE)
+        for name, method, url, client, budget, *data in BUDGETS:
+            status, count, queries = large[name]
+            with self.subTest(name):
+                self.assertLess(status, 400)
+                self.assertLessEqual(
+                    count, budget, self.format_queries(queries))
+                self.assertEqual(
+                    small[name][1], count,
+                    'Число запросов растет с объемом данных:\n'
+                    + self.format_queries(queries))
@@ -0,0 +1,141 @@
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from rest_framework import status
+from rest_framework.exceptions import APIException
+from rest_framework.throttling import SimpleRateThrottle
+
+
+class ScopedTokenBucketThrottle(SimpleRateThrottle):
+    cache_format = 'bucket_%(scope)s_%(ident)s'
+    kind = None
+    lock_timeout = 1
+    lock_attempts = 20
+    lock_delay = 0.005
+
+    def __init__(self):
+        self.wait_time = None
+
+    def allow_request(self, request, view):
+        view_scope = getattr(view, 'throttle_scope', None)
+        if not view_scope:
+            return True
+        self.scope = f'{view_scope}_{self.kind}'
+        self.rate = self.THROTTLE_RATES.get(self.scope)
+        if self.rate is None:
+            return True
+        capacity, duration = self.parse_rate(self.rate)
+        key = self.get_cache_key(request, view)
+        if key is None:
+            return True
+        lock_key = f'{key}_lock'
+        for _ in range(self.lock_attempts):
+            if self.cache.add(lock_key, 1, self.lock_timeout):
+                break
+            time.sleep(self.lock_delay)
+        else:
+            self.wait_time = self.lock_timeout
+            return False
+        try:
+            return self.take_token(key, capacity, duration)
+        finally:
+            self.cache.delete(lock_key)
+
+    def take_token(self, key, capacity, duration):
+        now = self.timer()
+        refill_rate = capacity / duration
+        tokens, updated_at = self.cache.get(key, (capacity, now))
+        tokens = min(capacity, tokens + (now - updated_at) * refill_rate)
+        if tokens < 1:
+            self.wait_time = (1 - tokens) / refill_rate
+            return False
+        self.cache.set(key, (tokens - 1, now), duration)
+        return True
+
+    def wait(self):
+        return self.wait_time
+
+
+class UserTokenBucketThrottle(ScopedTokenBucketThrottle):
+    kind = 'user'
+
+    def get_cache_key(self, request, view):
+        if not request.user.is_authenticated:
+            return None
+        return self.cache_format % {
+            'scope': self.scope,
+            'ident': request.user.pk
+        }
+
+
+class IPTokenBucketThrottle(ScopedTokenBucketThrottle):
+    kind = 'ip'
+
+    def get_cache_key(self, request, view):
+        return self.cache_format % {
+            'scope': self.scope,
+            'ident': self.get_ident(request)
+        }
+
+
+class ServiceOverloaded(APIException):
+    status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+    default_detail = 'Сервер перегружен, повторите запрос позже.'
+    default_code = 'service_overloaded'
+
+    def __init__(self, wait, detail=None, code=None):
+        super().__init__(detail, code)
+        self.wait = wait
+
+
+class ConcurrencyLimitMixin:
+    concurrency_key = None
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        scope = getattr(self, 'throttle_scope', None)
+        limit = settings.CONCURRENCY_LIMITS.get(scope)
+        if limit is None:
+            return
+        for number in range(limit):
+            key = f'in_flight_{scope}_{number}'
+            if cache.add(key, 1, settings.CONCURRENCY_KEY_TIMEOUT):
+                self.concurrency_key = key
+                return
+        raise ServiceOverloaded(settings.CONCURRENCY_RETRY_AFTER)
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        response = super().finalize_response(
+            request, response, *args, **kwargs)
+        key, self.concurrency_key = self.concurrency_key, None
+        if key is None:
+            return response
+        if response.streaming:
+            response.streaming_content = ReleasingIterator(
+                response.streaming_content, key)
+        else:
+            cache.delete(key)
+        return response
+
+
+class ReleasingIterator:
+    def __init__(self, content, key):
+        self.content = iter(content)
+        self.key = key
+        self.touched_at = time.monotonic()
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        if (self.key is not None and time.monotonic() - self.touched_at
+                > settings.CONCURRENCY_KEY_TIMEOUT / 2):
+            cache.touch(self.key, settings.CONCURRENCY_KEY_TIMEOUT)
+            self.touched_at = time.monotonic()
+        return next(self.content)
+
+    def close(self):
+        if self.key is not None:
+            cache.delete(self.key)
+            self.key = None
@@ -1,16 +1,24 @@
+from django.conf import settings
 from django.urls import include, path
 from rest_framework.routers import SimpleRouter
 
-from api.views import (IngredientViewSet, RecipeViewSet, TagViewSet,
-                       UserSubscriptionViewSet)
+from api.async_views import async_read_urls
+from api.views import (IngredientViewSet, MealPlanViewSet, RecipeViewSet,
+                       TagViewSet, UploadViewSet, UserSubscriptionViewSet)
 
 router = SimpleRouter()
 router.register(r'tags', TagViewSet, basename='tag')
 router.register(r'ingredients', IngredientViewSet, basename='ingredient')
 router.register(r'recipes', RecipeViewSet, basename='recipe')
+router.register(r'meal-plan', MealPlanViewSet, basename='meal-plan')
+router.register(r'uploads', UploadViewSet, basename='upload')
 router.register(r'users', UserSubscriptionViewSet)
 
+router_urls = router.urls
+if settings.ASYNC_READ_API:
+    router_urls = async_read_urls(router_urls)
+
 urlpatterns = [
     path('auth/', include('djoser.urls.authtoken')),
-    path('', include(router.urls)),
+    path('', include(router_urls)),
 ]
@@ -1,21 +1,41 @@
+import os
+from datetime import timedelta
+
+from django.conf import settings
 from django.contrib.auth import get_user_model
-from django.http.response import HttpResponse
+from django.db import OperationalError, transaction
+from django.db.models import (Count, Exists, OuterRef, Prefetch, Q,
+                              Subquery, Value)
+from django.http.response import StreamingHttpResponse
 from django.shortcuts import get_object_or_404
+from django.utils import timezone
 from django_filters import rest_framework as filters
 from djoser.views import UserViewSet
-from rest_framework import permissions, status, viewsets
+from PIL import Image
+from rest_framework import mixins, permissions, status, viewsets
 from rest_framework.decorators import action
+from rest_framework.parsers import FormParser, JSONParser
 from rest_framework.response import Response
 
 from api.filters import IngredientFilter, RecipeFilter
-from api.paginations import LimitPagination
+from api.paginations import EstimatedCountPagination, UserCursorPagination
+from api.parsers import LimitedMultiPartParser
 from api.permissions import IsAuthorOrReadOnly
-from api.serializers import (IngredientSerializer, RecipeCreationSerializer,
+from api.serializers import (ChunkedUploadSerializer, IngredientSerializer,
+                             MealPlanEntrySerializer, MealPlanRangeSerializer,
+                             RecipeCreationSerializer,
                              RecipeSerializer, RecipeShortInfoSerializer,
-                             TagSerializer, UserSubscriptionSerializer)
-from recipes.models import (FavoriteRecipe, Ingredient, Recipe,
-                            RecipeIngredient, ShoppingCart, Tag)
+                             TagSerializer, UserSubscriptionSerializer,
+                             WhatToCookSerializer)
+from api.shopping import aggregate_ingredients, shopping_list_response
+from api.throttling import ConcurrencyLimitMixin
+from recipes.export import iter_ndjson
+from recipes.models import (FavoriteRecipe, Ingredient, MealPlanEntry,
+                            Recipe, RecipeIngredient, ShoppingCart, Tag)
+from recipes.search import ingredient_index
+from uploads.models import ChunkedUpload
 from users.models import Subscription
+from users.tasks import delete_user_account
 
 
 class TagViewSet(viewsets.ReadOnlyModelViewSet):
@@ -24,21 +44,38 @@ class TagViewSet(viewsets.ReadOnlyModelViewSet):
     permission_classes = [permissions.AllowAny]
 
 
-class IngredientViewSet(viewsets.ReadOnlyModelViewSet):
+class IngredientViewSet(ConcurrencyLimitMixin,
+                        viewsets.ReadOnlyModelViewSet):
     queryset = Ingredient.objects.all()
     serializer_class = IngredientSerializer
     permission_classes = [permissions.AllowAny]
+    throttle_scope = 'ingredients'
     filter_backends = [filters.DjangoFilterBackend]
     filterset_class = IngredientFilter
 
 
-class RecipeViewSet(viewsets.ModelViewSet):
+class RecipeViewSet(ConcurrencyLimitMixin, viewsets.ModelViewSet):
     queryset = Recipe.objects.all()
     permission_classes = [IsAuthorOrReadOnly]
-    pagination_class = LimitPagination
+    throttle_scope = 'recipes'
+    pagination_class = EstimatedCountPagination
     http_method_names = ['get', 'post', 'put', 'delete', 'patch']
     filter_backends = [filters.DjangoFilterBackend]
     filterset_class = RecipeFilter
+    parser_classes = [JSONParser, LimitedMultiPartParser, FormParser]
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        user = self.request.user
+        if user.is_authenticated:
+            queryset = queryset.annotate(
+                is_favorited=Exists(FavoriteRecipe.objects.filter(
+                    user=user, recipe=OuterRef('pk'))),
+                is_in_shopping_cart=Exists(ShoppingCart.objects.filter(
+                    user=user, recipe=OuterRef('pk'))),
+                author_is_subscribed=Exists(Subscription.objects.filter(
+                    subscriber=user, author=OuterRef('author'))))
+        return queryset
 
     def get_serializer_class(self):
         if self.request.method == 'GET':
@@ -73,31 +110,56 @@ class RecipeViewSet(viewsets.ModelViewSet):
         return Response(status=status.HTTP_204_NO_CONTENT)
 
     @action(detail=False, methods=['get'],
-            permission_classes=[permissions.IsAuthenticated])
+            permission_classes=[permissions.IsAuthenticated],
+            throttle_scope='shopping_list')
     def download_shopping_cart(self, request):
-        shopping_list = {}
-        for name, unit, amount in RecipeIngredient.objects.filter(
+        return shopping_list_response(aggregate_ingredients(
+            RecipeIngredient.objects.filter(
                 recipe__shopping_cart__user=self.request.user).values_list(
-                    'ingredient__name', 'ingredient__measurement_unit',
-                    'amount'):
-            if name not in shopping_list:
-                shopping_list[name] = {
-                    'amount': amount,
-                    'unit': unit
-                }
-            else:
-                shopping_list[name]['amount'] += amount
-        purchase_list = []
-        for item in shopping_list:
-            purchase_list.append(
-                f"{item} ({shopping_list[item]['unit']}) — "
-                f"{shopping_list[item]['amount']}\n")
-        response = HttpResponse(purchase_list,
-                                'Content-Type: application/txt')
+                    'ingredient_id', 'ingredient__name',
+                    'ingredient__measurement_unit', 'amount', Value(1))))
+
+    @action(detail=False, methods=['get'],
+            permission_classes=[permissions.IsAdminUser],
+            throttle_scope='export')
+    def export(self, request):
+        compress = request.query_params.get('gzip') in ('1', 'true')
+        filename = 'recipes.ndjson.gz' if compress else 'recipes.ndjson'
+        response = StreamingHttpResponse(
+            iter_ndjson(compress=compress),
+            content_type=('application/gzip' if compress
+                          else 'application/x-ndjson'))
         response['Content-Disposition'] = (
-            'attachment; filename="purchase_list.txt"')
+            f'attachment; filename="{filename}"')
         return response
 
+    @action(detail=False, methods=['get'], url_path='what-to-cook',
+            permission_classes=[permissions.AllowAny],
+            throttle_scope='what_to_cook')
+    def what_to_cook(self, request):
+        query = WhatToCookSerializer(data=request.query_params)
+        query.is_valid(raise_exception=True)
+        tag_ids = None
+        if query.validated_data.get('tags'):
+            tag_ids = Tag.objects.filter(
+                slug__in=query.validated_data['tags']).values_list(
+                    'id', flat=True)
+        results = ingredient_index.search(
+            query.validated_data['ingredients'], tag_ids,
+            query.validated_data.get('max_cooking_time'))
+        page = self.paginate_queryset(results)
+        recipes = self.get_queryset().in_bulk(
+            [recipe_id for recipe_id, coverage in page])
+        data = []
+        for recipe_id, coverage in page:
+            if recipe_id not in recipes:
+                continue
+            recipe_data = RecipeSerializer(
+                recipes[recipe_id], context={'request': request}).data
+            recipe_data['coverage'] = round(coverage, 4)
+            data.append(recipe_data)
+        return self.get_paginated_response(data)
+
     @action(detail=True, methods=['get', 'delete'],
             permission_classes=[permissions.IsAuthenticated])
     def favorite(self, request, pk=None):
@@ -122,14 +184,194 @@ class RecipeViewSet(viewsets.ModelViewSet):
         return Response(status=status.HTTP_204_NO_CONTENT)
 
 
-class UserSubscriptionViewSet(UserViewSet):
-    pagination_class = LimitPagination
+class MealPlanViewSet(ConcurrencyLimitMixin, viewsets.ModelViewSet):
+    serializer_class = MealPlanEntrySerializer
+    permission_classes = [permissions.IsAuthenticated]
+    pagination_class = None
+    throttle_scope = 'meal_plan'
+    http_method_names = ['get', 'post', 'patch', 'delete']
+
+    def get_queryset(self):
+        queryset = MealPlanEntry.objects.filter(
+            user=self.request.user).select_related('recipe')
+        if self.action == 'list':
+            start, end = self.get_range()
+            queryset = queryset.filter(date__range=(start, end))
+        return queryset
+
+    def get_range(self):
+        params = self.request.query_params
+        if 'start' not in params and 'end' not in params:
+            start = timezone.localdate()
+            start -= timedelta(days=start.weekday())
+            return start, start + timedelta(days=6)
+        serializer = MealPlanRangeSerializer(data=params)
+        serializer.is_valid(raise_exception=True)
+        return serializer.validated_data['start'], (
+            serializer.validated_data['end'])
+
+    def perform_create(self, serializer):
+        serializer.save(user=self.request.user)
+
+    def get_ingredients(self):
+        start, end = self.get_range()
+        return aggregate_ingredients(MealPlanEntry.objects.filter(
+            user=self.request.user, date__range=(start, end),
+            recipe__recipeingredient__isnull=False).values_list(
+                'recipe__recipeingredient__ingredient_id',
+                'recipe__recipeingredient__ingredient__name',
+                'recipe__recipeingredient__ingredient__measurement_unit',
+                'recipe__recipeingredient__amount', 'servings'))
+
+    @action(detail=False, methods=['get'])
+    def ingredients(self, request):
+        return Response(self.get_ingredients())
+
+    @action(detail=False, methods=['get'], throttle_scope='shopping_list')
+    def download(self, request):
+        return shopping_list_response(
+            self.get_ingredients(), 'meal_plan_purchase_list.txt')
+
+
+class UploadViewSet(mixins.CreateModelMixin, mixins.RetrieveModelMixin,
+                    mixins.DestroyModelMixin, viewsets.GenericViewSet):
+    serializer_class = ChunkedUploadSerializer
+    permission_classes = [permissions.IsAuthenticated]
+    http_method_names = ['get', 'post', 'patch', 'delete']
+    throttle_scope = 'uploads'
+    image_signatures = (b'\xff\xd8\xff', b'\x89PNG\r\n\x1a\n', b'GIF8')
+
+    def get_queryset(self):
+        return ChunkedUpload.objects.filter(user=self.request.user)
+
+    def perform_create(self, serializer):
+        serializer.save(user=self.request.user)
+
+    def partial_update(self, request, pk=None):
+        try:
+            offset = int(request.META['HTTP_UPLOAD_OFFSET'])
+            length = int(request.META['CONTENT_LENGTH'])
+        except (KeyError, ValueError):
+            return Response(
+                {'errors': 'Необходимо указать заголовки Upload-Offset '
+                           'и Content-Length!'},
+                status=status.HTTP_400_BAD_REQUEST)
+        try:
+            with transaction.atomic():
+                return self.append_chunk(request, offset, length)
+        except OperationalError:
+            return Response(
+                {'errors': 'Загрузка уже принимает другую часть файла!'},
+                status=status.HTTP_409_CONFLICT)
+
+    def append_chunk(self, request, offset, length):
+        upload = get_object_or_404(
+            self.get_queryset().select_for_update(nowait=True),
+            pk=self.kwargs['pk'])
+        if upload.completed_at is not None:
+            return Response(
+                {'errors': 'Загрузка уже завершена!'},
+                status=status.HTTP_400_BAD_REQUEST)
+        if offset != upload.offset:
+            return Response(
+                {'errors': 'Неверное смещение!', 'offset': upload.offset},
+                status=status.HTTP_409_CONFLICT)
+        if offset + length > upload.size:
+            return Response(
+                {'errors': 'Размер данных превышает заявленный!'},
+                status=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE)
+        written = self.write_chunk(upload, request.stream, offset, length)
+        if written is None:
+            upload.delete()
+            return Response(
+                {'errors': 'Файл не является изображением!'},
+                status=status.HTTP_400_BAD_REQUEST)
+        upload.offset = offset + written
+        if upload.offset == upload.size:
+            if not self.is_image(upload.path):
+                upload.delete()
+                return Response(
+                    {'errors': 'Файл не является изображением!'},
+                    status=status.HTTP_400_BAD_REQUEST)
+            upload.completed_at = timezone.now()
+        upload.save(update_fields=['offset', 'completed_at'])
+        return Response(self.get_serializer(upload).data)
+
+    def write_chunk(self, upload, stream, offset, length):
+        os.makedirs(settings.UPLOAD_TEMP_ROOT, exist_ok=True)
+        written = 0
+        with open(upload.path, 'ab') as file:
+            file.truncate(offset)
+            while stream is not None and written < length:
+                chunk = stream.read(
+                    min(settings.UPLOAD_READ_CHUNK_SIZE, length - written))
+                if not chunk:
+                    break
+                if offset == 0 and written == 0 and not chunk.startswith(
+                        self.image_signatures):
+                    return None
+                file.write(chunk)
+                written += len(chunk)
+        return written
+
+    def is_image(self, path):
+        try:
+            with Image.open(path) as image:
+                image.verify()
+        except Exception:
+            return False
+        return True
+
+
+class UserSubscriptionViewSet(ConcurrencyLimitMixin, UserViewSet):
+    pagination_class = EstimatedCountPagination
+    throttle_scope = 'users'
+
+    @property
+    def paginator(self):
+        if not hasattr(self, '_paginator'):
+            if self.action == 'list':
+                self._paginator = UserCursorPagination()
+            else:
+                self._paginator = self.pagination_class()
+        return self._paginator
+
+    def perform_destroy(self, instance):
+        delete_user_account(instance)
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        user = self.request.user
+        if user.is_authenticated:
+            queryset = queryset.annotate(is_subscribed=Exists(
+                Subscription.objects.filter(
+                    subscriber=user, author=OuterRef('pk'))))
+        search = self.request.query_params.get('search')
+        if self.action == 'list' and search:
+            queryset = queryset.filter(
+                Q(username__istartswith=search)
+                | Q(first_name__istartswith=search)
+                | Q(last_name__istartswith=search))
+        return queryset
 
     @action(detail=False, methods=['get'],
             permission_classes=[permissions.IsAuthenticated])
     def subscriptions(self, request):
+        recipes = Recipe.objects.order_by('-created_at').only(
+            'id', 'name', 'image', 'cooking_time', 'author_id')
+        recipes_limit = request.query_params.get('recipes_limit')
+        if recipes_limit is not None:
+            recipes = recipes.filter(id__in=Subquery(
+                Recipe.objects.filter(author=OuterRef('author'))
+                .order_by('-created_at').values('id')[:int(recipes_limit)]))
         queryset = (get_user_model().objects
-                    .filter(subscribing__subscriber=self.request.user))
+                    .filter(subscribing__subscriber=self.request.user)
+                    .annotate(is_subscribed=Value(True),
+                              recipes_count=Count('recipes'))
+                    .prefetch_related(Prefetch(
+                        'recipes', queryset=recipes,
+                        to_attr='prefetched_recipes'))
+                    .order_by('id'))
         page = self.paginate_queryset(queryset)
         if page is not None:
             serializer = UserSubscriptionSerializer(
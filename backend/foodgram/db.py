@@ -0,0 +1,39 @@
+from django.db import migrations
+
+# Внешние ключи моделей объявлены с on_delete=DO_NOTHING, а каскадное
+# удаление выполняет PostgreSQL (ON DELETE CASCADE), поэтому Django не
+# загружает связанные объекты при удалении.
+
+
+def cascade_foreign_key(table, column, to_table, on_delete):
+    return f"""
+        DO $$
+        DECLARE fk_name text;
+        BEGIN
+            SELECT con.conname INTO fk_name
+            FROM pg_constraint con
+            JOIN pg_attribute att ON att.attrelid = con.conrelid
+                AND att.attnum = ANY(con.conkey)
+            WHERE con.contype = 'f'
+                AND con.conrelid = '{table}'::regclass
+                AND att.attname = '{column}';
+            IF fk_name IS NULL THEN
+                RAISE EXCEPTION 'Внешний ключ {table}.{column} не найден';
+            END IF;
+            EXECUTE format('ALTER TABLE {table} DROP CONSTRAINT %I', fk_name);
+        END $$;
+        ALTER TABLE {table} ADD CONSTRAINT {table}_{column}_fk
+            FOREIGN KEY ({column}) REFERENCES {to_table} (id) {on_delete}
+            DEFERRABLE INITIALLY DEFERRED;
+    """
+
+
+def cascade_operations(foreign_keys):
+    return [
+        migrations.RunSQL(
+            sql=cascade_foreign_key(table, column, to_table,
+                                    'ON DELETE CASCADE'),
+            reverse_sql=cascade_foreign_key(table, column, to_table, ''),
+        )
+        for table, column, to_table in foreign_keys
+    ]
@@ -1,4 +1,5 @@
 import os
+from datetime import datetime, timezone
 from pathlib import Path
 
 BASE_DIR = Path(__file__).resolve().parent.parent
@@ -16,6 +17,7 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'django.contrib.postgres',
     'rest_framework',
     'rest_framework.authtoken',
     'djoser',
@@ -23,6 +25,9 @@ INSTALLED_APPS = [
     'django_filters',
     'users',
     'recipes',
+    'jobs',
+    'profiling',
+    'uploads',
     'api',
 ]
 
@@ -32,6 +37,7 @@ MIDDLEWARE = [
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'profiling.middleware.ProfilingMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -56,6 +62,9 @@ TEMPLATES = [
 
 WSGI_APPLICATION = 'foodgram.wsgi.application'
 
+ASYNC_READ_API = os.environ.get('ASYNC_READ_API') == '1'
+ASYNC_READ_THREADS = int(os.environ.get('ASYNC_READ_THREADS', 8))
+
 DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.postgresql',
@@ -67,6 +76,14 @@ DATABASES = {
     }
 }
 
+if os.environ.get('MEMCACHED_LOCATION'):
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.memcached.PyMemcacheCache',
+            'LOCATION': os.environ.get('MEMCACHED_LOCATION'),
+        }
+    }
+
 AUTH_USER_MODEL = 'users.User'
 
 AUTH_PASSWORD_VALIDATORS = [
@@ -119,4 +136,78 @@ REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
         'rest_framework.authentication.TokenAuthentication',
     ),
+    'DEFAULT_THROTTLE_CLASSES': (
+        'api.throttling.UserTokenBucketThrottle',
+        'api.throttling.IPTokenBucketThrottle',
+    ),
+    'DEFAULT_THROTTLE_RATES': {
+        'recipes_user': '120/min',
+        'recipes_ip': '300/min',
+        'ingredients_user': '120/min',
+        'ingredients_ip': '300/min',
+        'users_user': '60/min',
+        'users_ip': '120/min',
+        'what_to_cook_user': '30/min',
+        'what_to_cook_ip': '60/min',
+        'shopping_list_user': '10/min',
+        'shopping_list_ip': '30/min',
+        'export_user': '2/hour',
+        'uploads_user': '120/min',
+        'meal_plan_user': '120/min',
+    },
+    'NUM_PROXIES': 1,
+}
+
+CONCURRENCY_LIMITS = {
+    'shopping_list': 4,
+    'what_to_cook': 4,
+    'export': 1,
+}
+CONCURRENCY_KEY_TIMEOUT = 60
+CONCURRENCY_RETRY_AFTER = 5
+
+PAGINATION_COUNT_TTL = 60
+PAGINATION_ESTIMATE_THRESHOLD = 10000
+
+INGREDIENT_INDEX_TTL = int(os.environ.get('INGREDIENT_INDEX_TTL', 3600))
+
+JOBS_WORKERS = int(os.environ.get('JOBS_WORKERS', 2))
+JOBS_MAX_ATTEMPTS = 5
+JOBS_RETRY_BACKOFF = 10
+JOBS_LOCK_TIMEOUT = 600
+JOBS_HEARTBEAT_INTERVAL = 60
+JOBS_DB_RETRY_DELAY = 5
+
+USER_SYNC_DELETE_MAX_ROWS = 5000
+IMAGE_DELETE_GRACE = 3600
+
+POPULARITY_EPOCH = datetime(2021, 1, 1, tzinfo=timezone.utc)
+POPULARITY_HALF_LIFE = 30 * 24 * 60 * 60
+TRENDING_HALF_LIFE = 24 * 60 * 60
+POPULARITY_WEIGHTS = {
+    'favorite': 1.0,
+    'shopping_cart': 0.5,
 }
+POPULARITY_UPDATE_DELAY = 10
+
+PROFILING_ROOT = os.path.join(BASE_DIR, 'backend_profiles')
+PROFILING_HEADER = 'HTTP_X_PROFILE'
+PROFILING_QUERY_PARAM = '_profile'
+PROFILING_SAMPLE_RATE = float(os.environ.get('PROFILING_SAMPLE_RATE', 1.0))
+PROFILING_MAX_RECORDS = 200
+PROFILING_RETENTION_DAYS = 7
+PROFILING_MAX_FUNCTIONS = 60
+
+MEAL_PLAN_MAX_DAYS = 31
+
+RECIPE_EVENTS_CHANNEL = 'recipe_events'
+EVENTS_HEARTBEAT = 15
+EVENTS_QUEUE_SIZE = 100
+EVENTS_SUBSCRIPTIONS_REFRESH = 60
+EVENTS_RECONNECT_DELAY = 5
+
+RECIPE_IMAGE_MAX_SIZE = 10 * 1024 * 1024
+RECIPE_UPLOAD_MAX_BODY_SIZE = RECIPE_IMAGE_MAX_SIZE + 1024 * 1024
+UPLOAD_TEMP_ROOT = os.path.join(BASE_DIR, 'backend_uploads')
+UPLOAD_READ_CHUNK_SIZE = 64 * 1024
+UPLOAD_EXPIRE_HOURS = 24
@@ -0,0 +1,27 @@
+from django.contrib import admin
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+
+from jobs.models import Job
+
+
+@admin.register(Job)
+class JobAdmin(admin.ModelAdmin):
+    list_display = ('id', 'name', 'status', 'attempts', 'run_at',
+                    'created_at', 'finished_at')
+    list_filter = ('status', 'name')
+    search_fields = ('name', 'dedup_key')
+    readonly_fields = ('attempts', 'locked_at', 'last_error', 'created_at',
+                       'finished_at')
+    actions = ['retry_jobs']
+
+    @admin.action(description='Перезапустить выбранные задачи')
+    def retry_jobs(self, request, queryset):
+        for job in queryset.exclude(status=Job.RUNNING):
+            try:
+                with transaction.atomic():
+                    Job.objects.filter(id=job.id).update(
+                        status=Job.PENDING, attempts=0,
+                        run_at=timezone.now(), finished_at=None)
+            except IntegrityError:
+                continue
@@ -0,0 +1,82 @@
+import logging
+import multiprocessing
+import signal
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import DatabaseError, close_old_connections, connections
+
+from jobs.queue import claim_jobs, run_jobs
+
+logger = logging.getLogger(__name__)
+
+
+def work(batch_size, poll_interval, stop_event, once=False):
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    signal.signal(signal.SIGTERM, signal.SIG_IGN)
+    while not stop_event.is_set():
+        try:
+            jobs = claim_jobs(batch_size)
+            run_jobs(jobs)
+        except DatabaseError:
+            logger.exception('Ошибка базы данных в обработчике задач')
+            connections.close_all()
+            stop_event.wait(settings.JOBS_DB_RETRY_DELAY)
+            continue
+        close_old_connections()
+        if not jobs:
+            if once:
+                return
+            stop_event.wait(poll_interval)
+
+
+class Command(BaseCommand):
+    help = 'Запускает обработчики фоновых задач'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '-p', '--processes', type=int, default=settings.JOBS_WORKERS,
+            help='Количество процессов-обработчиков')
+        parser.add_argument(
+            '--batch-size', type=int, default=10,
+            help='Количество задач, забираемых процессом за один раз')
+        parser.add_argument(
+            '--poll-interval', type=float, default=1.0,
+            help='Пауза между опросами пустой очереди, с')
+        parser.add_argument(
+            '--once', action='store_true',
+            help='Выполнить готовые задачи в текущем процессе и выйти')
+
+    def handle(self, *args, **options):
+        stop_event = multiprocessing.Event()
+        if options['once']:
+            work(options['batch_size'], options['poll_interval'],
+                 stop_event, once=True)
+            return
+        connections.close_all()
+        args = (options['batch_size'], options['poll_interval'], stop_event)
+        processes = [
+            multiprocessing.Process(target=work, args=args)
+            for _ in range(options['processes'])
+        ]
+        for process in processes:
+            process.start()
+
+        def stop(signum, frame):
+            stop_event.set()
+
+        signal.signal(signal.SIGINT, stop)
+        signal.signal(signal.SIGTERM, stop)
+        self.stdout.write(
+            f'Запущено обработчиков: {len(processes)}')
+        while not stop_event.wait(options['poll_interval']):
+            for number, process in enumerate(processes):
+                if process.is_alive():
+                    continue
+                logger.error('Обработчик %s завершился с кодом %s, '
+                             'перезапуск', process.pid, process.exitcode)
+                processes[number] = multiprocessing.Process(
+                    target=work, args=args)
+                processes[number].start()
+        for process in processes:
+            process.join()
@@ -0,0 +1,55 @@
+from django.db import models
+from django.utils import timezone
+
+
+class Job(models.Model):
+    PENDING = 'pending'
+    RUNNING = 'running'
+    DONE = 'done'
+    FAILED = 'failed'
+    STATUS_CHOICES = (
+        (PENDING, 'В очереди'),
+        (RUNNING, 'Выполняется'),
+        (DONE, 'Выполнена'),
+        (FAILED, 'Ошибка'),
+    )
+
+    name = models.CharField(max_length=200, verbose_name='Задача')
+    payload = models.JSONField(
+        default=dict, blank=True, verbose_name='Параметры')
+    dedup_key = models.CharField(
+        max_length=200, null=True, blank=True,
+        verbose_name='Ключ дедупликации')
+    status = models.CharField(
+        max_length=10, choices=STATUS_CHOICES, default=PENDING,
+        verbose_name='Статус')
+    attempts = models.PositiveSmallIntegerField(
+        default=0, verbose_name='Попыток')
+    max_attempts = models.PositiveSmallIntegerField(
+        default=5, verbose_name='Максимум попыток')
+    run_at = models.DateTimeField(
+        default=timezone.now, verbose_name='Запустить после')
+    locked_at = models.DateTimeField(
+        null=True, blank=True, verbose_name='Взята в работу')
+    last_error = models.TextField(blank=True, verbose_name='Последняя ошибка')
+    created_at = models.DateTimeField(
+        auto_now_add=True, verbose_name='Дата создания')
+    finished_at = models.DateTimeField(
+        null=True, blank=True, verbose_name='Дата завершения')
+
+    class Meta:
+        ordering = ['-created_at']
+        verbose_name = 'Задача'
+        verbose_name_plural = 'Задачи'
+        indexes = [
+            models.Index(fields=['status', 'run_at'],
+                         name='job_status_run_at')
+        ]
+        constraints = [
+            models.UniqueConstraint(
+                fields=['dedup_key'], condition=models.Q(status='pending'),
+                name='unique_pending_job_dedup_key')
+        ]
+
+    def __str__(self):
+        return f'{self.name} #{self.pk}'
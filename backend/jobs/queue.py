@@ -0,0 +1,132 @@
+import threading
+import traceback
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import DatabaseError, IntegrityError, connection, transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from jobs.models import Job
+
+registry = {}
+
+
+def task(name):
+    def decorator(func):
+        registry[name] = func
+        return func
+    return decorator
+
+
+def enqueue(name, payload=None, dedup_key=None, delay=0,
+            max_attempts=None):
+    job = Job(
+        name=name, payload=payload or {}, dedup_key=dedup_key,
+        run_at=timezone.now() + timedelta(seconds=delay),
+        max_attempts=max_attempts or settings.JOBS_MAX_ATTEMPTS)
+    if dedup_key is None:
+        job.save()
+        return job
+    try:
+        with transaction.atomic():
+            job.save()
+    except IntegrityError:
+        return Job.objects.filter(
+            dedup_key=dedup_key, status=Job.PENDING).first()
+    return job
+
+
+def claim_jobs(limit):
+    now = timezone.now()
+    stale = now - timedelta(seconds=settings.JOBS_LOCK_TIMEOUT)
+    with transaction.atomic():
+        Job.objects.filter(
+            status=Job.RUNNING, locked_at__lt=stale,
+            attempts__gte=F('max_attempts')).update(
+                status=Job.FAILED, finished_at=now, locked_at=None,
+                last_error='Обработчик не завершил задачу')
+        jobs = list(
+            Job.objects.select_for_update(skip_locked=True)
+            .filter(Q(status=Job.PENDING, run_at__lte=now)
+                    | Q(status=Job.RUNNING, locked_at__lt=stale,
+                        attempts__lt=F('max_attempts')))
+            .order_by('run_at')[:limit])
+        Job.objects.filter(id__in=[job.id for job in jobs]).update(
+            status=Job.RUNNING, locked_at=now, attempts=F('attempts') + 1)
+    for job in jobs:
+        job.status = Job.RUNNING
+        job.locked_at = now
+        job.attempts += 1
+    return jobs
+
+
+class Heartbeat(threading.Thread):
+    def __init__(self, jobs):
+        super().__init__(daemon=True)
+        self.job_ids = {job.id for job in jobs}
+        self.lock = threading.Lock()
+        self.stopped = threading.Event()
+
+    def run(self):
+        try:
+            while not self.stopped.wait(settings.JOBS_HEARTBEAT_INTERVAL):
+                with self.lock:
+                    job_ids = list(self.job_ids)
+                try:
+                    Job.objects.filter(
+                        id__in=job_ids, status=Job.RUNNING).update(
+                            locked_at=timezone.now())
+                except DatabaseError:
+                    connection.close()
+        finally:
+            connection.close()
+
+    def finish(self, job):
+        with self.lock:
+            self.job_ids.discard(job.id)
+
+    def stop(self):
+        self.stopped.set()
+        self.join()
+
+
+def run_jobs(jobs):
+    heartbeat = Heartbeat(jobs)
+    heartbeat.start()
+    try:
+        for job in jobs:
+            run_job(job)
+            heartbeat.finish(job)
+    finally:
+        heartbeat.stop()
+
+
+def run_job(job):
+    try:
+        if job.name not in registry:
+            raise LookupError(f'Неизвестная задача: {job.name}')
+        registry[job.name](**job.payload)
+    except Exception:
+        fail_job(job, traceback.format_exc())
+        return False
+    Job.objects.filter(id=job.id).update(
+        status=Job.DONE, finished_at=timezone.now(), locked_at=None)
+    return True
+
+
+def fail_job(job, error):
+    now = timezone.now()
+    jobs = Job.objects.filter(id=job.id)
+    if job.attempts >= job.max_attempts:
+        jobs.update(status=Job.FAILED, last_error=error, finished_at=now,
+                    locked_at=None)
+        return
+    delay = settings.JOBS_RETRY_BACKOFF * 2 ** (job.attempts - 1)
+    try:
+        with transaction.atomic():
+            jobs.update(status=Job.PENDING, last_error=error, locked_at=None,
+                        run_at=now + timedelta(seconds=delay))
+    except IntegrityError:
+        jobs.update(status=Job.FAILED, last_error=error, finished_at=now,
+                    locked_at=None)
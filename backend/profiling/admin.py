@@ -0,0 +1,44 @@
+from django.contrib import admin
+from django.core.exceptions import PermissionDenied
+from django.http import FileResponse
+from django.shortcuts import get_object_or_404
+from django.urls import path, reverse
+from django.utils.html import format_html
+
+from profiling.models import RequestProfile
+
+
+@admin.register(RequestProfile)
+class RequestProfileAdmin(admin.ModelAdmin):
+    list_display = ('created_at', 'method', 'path', 'user', 'status_code',
+                    'duration_ms', 'sql_count', 'sql_time_ms', 'download')
+    list_filter = ('method', 'status_code')
+    search_fields = ('path',)
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def get_urls(self):
+        return [
+            path('<int:pk>/download/',
+                 self.admin_site.admin_view(self.download_view),
+                 name='profiling_requestprofile_download'),
+        ] + super().get_urls()
+
+    def download_view(self, request, pk):
+        record = get_object_or_404(RequestProfile, pk=pk)
+        if not self.has_view_permission(request, record):
+            raise PermissionDenied
+        return FileResponse(
+            record.report.open('rb'), as_attachment=True,
+            filename=f'profile-{record.pk}.txt')
+
+    @admin.display(description='Отчет')
+    def download(self, obj):
+        return format_html(
+            '<a href="{}">Скачать</a>',
+            reverse('admin:profiling_requestprofile_download',
+                    args=[obj.pk]))
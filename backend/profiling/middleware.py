@@ -0,0 +1,139 @@
+import asyncio
+import cProfile
+import io
+import pstats
+import random
+import time
+from datetime import timedelta
+
+from asgiref.sync import async_to_sync, sync_to_async
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.db import connection
+from django.db.models import Q
+from django.utils import timezone
+from rest_framework.authentication import TokenAuthentication
+from rest_framework.exceptions import AuthenticationFailed
+
+from profiling.models import RequestProfile
+
+
+class QueryRecorder:
+    def __init__(self):
+        self.queries = []
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries.append((time.perf_counter() - start, sql, params))
+
+
+class ProfilingMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if asyncio.iscoroutinefunction(get_response):
+            self._is_coroutine = asyncio.coroutines._is_coroutine
+
+    def __call__(self, request):
+        if asyncio.iscoroutinefunction(self.get_response):
+            return self.__acall__(request)
+        if not self.is_requested(request):
+            return self.get_response(request)
+        user = self.get_staff_user(request)
+        if not self.is_sampled(user):
+            return self.get_response(request)
+        return self.profile(request, user, self.get_response)
+
+    async def __acall__(self, request):
+        if not self.is_requested(request):
+            return await self.get_response(request)
+        user = await sync_to_async(self.get_staff_user)(request)
+        if not self.is_sampled(user):
+            return await self.get_response(request)
+        return await sync_to_async(self.profile)(
+            request, user, async_to_sync(self.get_response))
+
+    def is_requested(self, request):
+        return (settings.PROFILING_HEADER in request.META
+                or settings.PROFILING_QUERY_PARAM in request.GET)
+
+    def is_sampled(self, user):
+        return (user is not None
+                and random.random() < settings.PROFILING_SAMPLE_RATE)
+
+    def get_staff_user(self, request):
+        user = request.user
+        if not user.is_authenticated:
+            try:
+                credentials = TokenAuthentication().authenticate(request)
+            except AuthenticationFailed:
+                return None
+            if credentials is None:
+                return None
+            user = credentials[0]
+        return user if user.is_staff else None
+
+    def profile(self, request, user, get_response):
+        request.profiling = True
+        recorder = QueryRecorder()
+        profiler = cProfile.Profile()
+        start = time.perf_counter()
+        with connection.execute_wrapper(recorder):
+            profiler.enable()
+            try:
+                response = get_response(request)
+            finally:
+                profiler.disable()
+        duration = time.perf_counter() - start
+        record = RequestProfile(
+            method=request.method,
+            path=request.get_full_path()[:2000],
+            user=user,
+            status_code=response.status_code,
+            duration_ms=duration * 1000,
+            sql_count=len(recorder.queries),
+            sql_time_ms=sum(
+                query[0] for query in recorder.queries) * 1000)
+        record.report.save(
+            f'{timezone.now():%H%M%S}-{request.method.lower()}.txt',
+            ContentFile(self.build_report(
+                record, recorder, profiler).encode()),
+            save=False)
+        record.save()
+        self.prune()
+        response['X-Profile-Id'] = str(record.pk)
+        return response
+
+    def build_report(self, record, recorder, profiler):
+        report = io.StringIO()
+        report.write(
+            f'{record.method} {record.path} -> {record.status_code}\n'
+            f'Время: {record.duration_ms:.1f} мс, '
+            f'SQL: {record.sql_count} запросов, '
+            f'{record.sql_time_ms:.1f} мс\n\n')
+        report.write('=== SQL ===\n')
+        for number, (duration, sql, params) in enumerate(
+                recorder.queries, start=1):
+            report.write(
+                f'#{number} {duration * 1000:.2f} мс\n{sql}\n'
+                f'params: {params!r}\n\n')
+        report.write('=== Функции (по суммарному времени) ===\n')
+        stats = pstats.Stats(profiler, stream=report)
+        stats.sort_stats(pstats.SortKey.CUMULATIVE)
+        stats.print_stats(settings.PROFILING_MAX_FUNCTIONS)
+        report.write('=== Дерево вызовов ===\n')
+        stats.print_callees(settings.PROFILING_MAX_FUNCTIONS)
+        return report.getvalue()
+
+    def prune(self):
+        extra_ids = list(RequestProfile.objects.order_by(
+            '-created_at').values_list('id', flat=True)[
+                settings.PROFILING_MAX_RECORDS:])
+        RequestProfile.objects.filter(
+            Q(id__in=extra_ids) | Q(created_at__lt=timezone.now() - timedelta(
+                days=settings.PROFILING_RETENTION_DAYS))).delete()
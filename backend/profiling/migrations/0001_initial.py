@@ -0,0 +1,38 @@
+# Generated by Django 3.2.6 on 2026-10-19 19:38
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+import profiling.models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RequestProfile',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('method', models.CharField(max_length=10, verbose_name='Метод')),
+                ('path', models.CharField(max_length=2000, verbose_name='Адрес')),
+                ('status_code', models.PositiveSmallIntegerField(verbose_name='Код ответа')),
+                ('duration_ms', models.FloatField(verbose_name='Длительность, мс')),
+                ('sql_count', models.PositiveIntegerField(verbose_name='Количество SQL-запросов')),
+                ('sql_time_ms', models.FloatField(verbose_name='Время SQL-запросов, мс')),
+                ('report', models.FileField(storage=profiling.models.get_profile_storage, upload_to='%Y/%m/%d', verbose_name='Отчет')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Дата создания')),
+                ('user', models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to=settings.AUTH_USER_MODEL, verbose_name='Пользователь')),
+            ],
+            options={
+                'verbose_name': 'Профиль запроса',
+                'verbose_name_plural': 'Профили запросов',
+                'ordering': ['-created_at'],
+            },
+        ),
+    ]
@@ -0,0 +1,36 @@
+from django.conf import settings
+from django.core.files.storage import FileSystemStorage
+from django.db import models
+
+profile_storage = FileSystemStorage(location=settings.PROFILING_ROOT)
+
+
+def get_profile_storage():
+    return profile_storage
+
+
+class RequestProfile(models.Model):
+    method = models.CharField(max_length=10, verbose_name='Метод')
+    path = models.CharField(max_length=2000, verbose_name='Адрес')
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True,
+        related_name='+', verbose_name='Пользователь')
+    status_code = models.PositiveSmallIntegerField(
+        verbose_name='Код ответа')
+    duration_ms = models.FloatField(verbose_name='Длительность, мс')
+    sql_count = models.PositiveIntegerField(
+        verbose_name='Количество SQL-запросов')
+    sql_time_ms = models.FloatField(verbose_name='Время SQL-запросов, мс')
+    report = models.FileField(
+        storage=get_profile_storage, upload_to='%Y/%m/%d',
+        verbose_name='Отчет')
+    created_at = models.DateTimeField(
+        auto_now_add=True, verbose_name='Дата создания')
+
+    class Meta:
+        ordering = ['-created_at']
+        verbose_name = 'Профиль запроса'
+        verbose_name_plural = 'Профили запросов'
+
+    def __str__(self):
+        return f'{self.method} {self.path}'
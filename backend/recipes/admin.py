@@ -1,6 +1,8 @@
 from django.contrib import admin
 
-from recipes.models import Ingredient, Recipe, RecipeIngredient, Tag
+from recipes.documents import refresh_documents
+from recipes.models import (Ingredient, MealPlanEntry, Recipe,
+                            RecipeIngredient, Tag)
 
 
 class IngredientRecipeInline(admin.TabularInline):
@@ -13,10 +15,21 @@ class RecipeAdmin(admin.ModelAdmin):
     list_filter = ('author', 'name', 'tags__name')
     inlines = [IngredientRecipeInline]
 
+    def save_related(self, request, form, formsets, change):
+        super().save_related(request, form, formsets, change)
+        refresh_documents([form.instance.pk])
+
 
 @admin.register(Ingredient)
 class IngredientAdmin(admin.ModelAdmin):
     list_display = ('name', 'measurement_unit')
 
 
+@admin.register(MealPlanEntry)
+class MealPlanEntryAdmin(admin.ModelAdmin):
+    list_display = ('user', 'recipe', 'date', 'servings')
+    list_filter = ('date',)
+    raw_id_fields = ('user', 'recipe')
+
+
 admin.site.register(Tag)
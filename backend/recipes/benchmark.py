@@ -0,0 +1,19 @@
+import statistics
+import time
+
+
+def measure(func, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append((time.perf_counter() - start) * 1000)
+    timings.sort()
+    return {
+        'median': statistics.median(timings),
+        'p95': timings[min(len(timings) - 1, int(len(timings) * 0.95))],
+    }
+
+
+def format_timing(timing):
+    return f'median {timing["median"]:.2f} мс, p95 {timing["p95"]:.2f} мс'
@@ -0,0 +1,74 @@
+from collections import defaultdict
+from itertools import islice
+
+from django.contrib.auth import get_user_model
+from django.core.files.storage import default_storage
+
+from recipes.models import Recipe, RecipeIngredient
+
+User = get_user_model()
+
+DOCUMENTS_CHUNK_SIZE = 500
+
+
+def chunked(iterable, size):
+    iterator = iter(iterable)
+    while True:
+        chunk = list(islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def load_related(recipe_ids, author_ids):
+    authors = {
+        author['id']: author for author in User.objects.filter(
+            id__in=author_ids).values(
+                'id', 'email', 'username', 'last_name', 'first_name')
+    }
+    tags = defaultdict(list)
+    for recipe_id, tag_id, name, color, slug in (
+            Recipe.tags.through.objects.filter(
+                recipe_id__in=recipe_ids).order_by('tag__name').values_list(
+                    'recipe_id', 'tag_id', 'tag__name', 'tag__color',
+                    'tag__slug')):
+        tags[recipe_id].append(
+            {'id': tag_id, 'name': name, 'color': color, 'slug': slug})
+    ingredients = defaultdict(list)
+    for recipe_id, ingredient_id, name, unit, amount in (
+            RecipeIngredient.objects.filter(
+                recipe_id__in=recipe_ids).order_by('id').values_list(
+                    'recipe_id', 'ingredient_id', 'ingredient__name',
+                    'ingredient__measurement_unit', 'amount')):
+        ingredients[recipe_id].append(
+            {'id': ingredient_id, 'name': name,
+             'measurement_unit': unit, 'amount': amount})
+    return authors, tags, ingredients
+
+
+def build_documents(recipe_ids):
+    recipes = list(Recipe.objects.filter(id__in=recipe_ids).values(
+        'id', 'author_id', 'name', 'image', 'text', 'cooking_time'))
+    authors, tags, ingredients = load_related(
+        [recipe['id'] for recipe in recipes],
+        {recipe['author_id'] for recipe in recipes})
+    return {
+        recipe['id']: {
+            'id': recipe['id'],
+            'author': authors.get(recipe['author_id']),
+            'tags': tags[recipe['id']],
+            'ingredients': ingredients[recipe['id']],
+            'name': recipe['name'],
+            'image': (default_storage.url(recipe['image'])
+                      if recipe['image'] else None),
+            'text': recipe['text'],
+            'cooking_time': recipe['cooking_time'],
+        }
+        for recipe in recipes
+    }
+
+
+def refresh_documents(recipe_ids):
+    for chunk in chunked(recipe_ids, DOCUMENTS_CHUNK_SIZE):
+        for recipe_id, document in build_documents(chunk).items():
+            Recipe.objects.filter(id=recipe_id).update(document=document)
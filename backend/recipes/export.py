@@ -0,0 +1,53 @@
+import json
+import zlib
+
+from django.core.serializers.json import DjangoJSONEncoder
+
+from recipes.documents import chunked, load_related
+from recipes.models import Recipe
+
+EXPORT_CHUNK_SIZE = 2000
+
+
+def build_export_documents(recipes):
+    authors, tags, ingredients = load_related(
+        [recipe['id'] for recipe in recipes],
+        {recipe['author_id'] for recipe in recipes})
+    for recipe in recipes:
+        yield {
+            'id': recipe['id'],
+            'name': recipe['name'],
+            'text': recipe['text'],
+            'image': recipe['image'],
+            'cooking_time': recipe['cooking_time'],
+            'created_at': recipe['created_at'],
+            'author': authors.get(recipe['author_id']),
+            'tags': tags[recipe['id']],
+            'ingredients': ingredients[recipe['id']],
+        }
+
+
+def iter_recipe_documents(chunk_size=EXPORT_CHUNK_SIZE):
+    recipes = Recipe.objects.order_by('id').values(
+        'id', 'name', 'text', 'image', 'cooking_time', 'created_at',
+        'author_id').iterator(chunk_size=chunk_size)
+    for chunk in chunked(recipes, chunk_size):
+        yield from build_export_documents(chunk)
+
+
+def iter_ndjson(chunk_size=EXPORT_CHUNK_SIZE, compress=False):
+    compressor = zlib.compressobj(wbits=31) if compress else None
+    buffer = []
+    for number, document in enumerate(
+            iter_recipe_documents(chunk_size), start=1):
+        buffer.append(json.dumps(
+            document, cls=DjangoJSONEncoder, ensure_ascii=False))
+        if number % chunk_size == 0:
+            data = ('\n'.join(buffer) + '\n').encode()
+            buffer = []
+            yield compressor.compress(data) if compressor else data
+    data = ('\n'.join(buffer) + '\n').encode() if buffer else b''
+    if compressor:
+        yield compressor.compress(data) + compressor.flush()
+    elif data:
+        yield data
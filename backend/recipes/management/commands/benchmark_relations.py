@@ -0,0 +1,108 @@
+import random
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+
+from recipes.benchmark import format_timing, measure
+
+PLAIN_TABLE = 'benchmark_relations_plain'
+PARTITIONED_TABLE = 'benchmark_relations_partitioned'
+PAGE_SIZE = 20
+
+
+class Command(BaseCommand):
+    help = ('Сравнивает время добавления/удаления и выборки строк '
+            'избранного в обычной и секционированной по хешу user_id '
+            'таблицах. Таблицы создаются во временной транзакции '
+            'и откатываются')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--rows', type=int, default=1000000,
+            help='Количество строк в каждой таблице')
+        parser.add_argument(
+            '--users', type=int, default=50000,
+            help='Количество пользователей')
+        parser.add_argument(
+            '--recipes', type=int, default=100000,
+            help='Количество рецептов')
+        parser.add_argument(
+            '--partitions', type=int, default=16,
+            help='Количество секций')
+        parser.add_argument(
+            '--repeat', type=int, default=200,
+            help='Количество повторов каждого запроса')
+
+    def create_tables(self, cursor, options):
+        columns = ('id bigserial, user_id bigint NOT NULL, '
+                   'recipe_id bigint NOT NULL, '
+                   'created_at timestamptz NOT NULL DEFAULT now()')
+        cursor.execute(
+            f'CREATE TEMP TABLE {PLAIN_TABLE} ({columns}, '
+            f'PRIMARY KEY (id), UNIQUE (user_id, recipe_id))')
+        cursor.execute(
+            f'CREATE TEMP TABLE {PARTITIONED_TABLE} ({columns}, '
+            f'PRIMARY KEY (id, user_id), UNIQUE (user_id, recipe_id)) '
+            f'PARTITION BY HASH (user_id)')
+        for remainder in range(options['partitions']):
+            cursor.execute(
+                f'CREATE TEMP TABLE {PARTITIONED_TABLE}_p{remainder} '
+                f'PARTITION OF {PARTITIONED_TABLE} FOR VALUES WITH '
+                f'(MODULUS {options["partitions"]}, '
+                f'REMAINDER {remainder})')
+        for table in (PLAIN_TABLE, PARTITIONED_TABLE):
+            cursor.execute(f'CREATE INDEX ON {table} (recipe_id)')
+            cursor.execute(
+                f'INSERT INTO {table} (user_id, recipe_id) '
+                f'SELECT 1 + floor(random() * %s), '
+                f'1 + floor(random() * %s) '
+                f'FROM generate_series(1, %s) '
+                f'ON CONFLICT DO NOTHING',
+                [options['users'], options['recipes'], options['rows']])
+            cursor.execute(f'ANALYZE {table}')
+
+    def queries(self, cursor, table, options):
+        def key():
+            return (random.randint(1, options['users']),
+                    random.randint(1, options['recipes']))
+
+        def toggle():
+            user_id, recipe_id = key()
+            cursor.execute(
+                f'INSERT INTO {table} (user_id, recipe_id) VALUES (%s, %s) '
+                f'ON CONFLICT DO NOTHING', [user_id, recipe_id])
+            cursor.execute(
+                f'DELETE FROM {table} WHERE user_id = %s AND recipe_id = %s',
+                [user_id, recipe_id])
+
+        def user_page():
+            cursor.execute(
+                f'SELECT recipe_id FROM {table} WHERE user_id = %s '
+                f'ORDER BY created_at DESC LIMIT {PAGE_SIZE}', [key()[0]])
+            cursor.fetchall()
+
+        def exists():
+            cursor.execute(
+                f'SELECT EXISTS (SELECT 1 FROM {table} '
+                f'WHERE user_id = %s AND recipe_id = %s)', key())
+            cursor.fetchone()
+
+        return {
+            'добавление и удаление': toggle,
+            'страница пользователя': user_page,
+            'is_favorited (EXISTS)': exists,
+        }
+
+    def handle(self, *args, **options):
+        with transaction.atomic(), connection.cursor() as cursor:
+            self.create_tables(cursor, options)
+            for title, table in (('Обычная таблица', PLAIN_TABLE),
+                                 ('Секционированная таблица',
+                                  PARTITIONED_TABLE)):
+                random.seed(0)
+                self.stdout.write(title)
+                for name, func in self.queries(
+                        cursor, table, options).items():
+                    self.stdout.write(f'    {name}: ' + format_timing(
+                        measure(func, options['repeat'])))
+            transaction.set_rollback(True)
@@ -0,0 +1,77 @@
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+
+from recipes.benchmark import format_timing, measure
+from recipes.models import Recipe, Tag
+
+PAGE_SIZE = 20
+
+
+class Command(BaseCommand):
+    help = ('Сравнивает время фильтрации рецептов по 1..N тегам через '
+            'массив tag_ids с GIN-индексом и через join по recipe_tags. '
+            'Данные создаются во временной транзакции и откатываются')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--recipes', type=int, default=200000,
+            help='Количество создаваемых рецептов')
+        parser.add_argument(
+            '--tags', type=int, default=12,
+            help='Количество создаваемых тегов')
+        parser.add_argument(
+            '--tag-probability', type=float, default=0.15,
+            help='Вероятность того, что рецепт отмечен тегом')
+        parser.add_argument(
+            '--repeat', type=int, default=20,
+            help='Количество повторов каждого запроса')
+
+    def seed(self, options):
+        tags = Tag.objects.bulk_create(
+            Tag(name=f'benchmark {number}', slug=f'benchmark-{number}')
+            for number in range(options['tags']))
+        tag_ids = [tag.id for tag in tags]
+        with connection.cursor() as cursor:
+            cursor.execute(
+                'INSERT INTO recipes_recipe (name, image, text, '
+                'cooking_time, created_at, document, popularity_score, '
+                'trending_score, tag_ids) '
+                "SELECT 'benchmark ' || g, 'benchmark.jpg', '', "
+                "1 + g %% 120, now() - g * interval '1 second', '{}', "
+                "'-Infinity', '-Infinity', ARRAY(SELECT id FROM "
+                'unnest(%s::bigint[]) AS tag(id) '
+                'WHERE random() < %s AND g IS NOT NULL) '
+                'FROM generate_series(1, %s) AS g',
+                [tag_ids, options['tag_probability'],
+                 options['recipes']])
+            cursor.execute(
+                'INSERT INTO recipes_recipe_tags (recipe_id, tag_id) '
+                'SELECT id, unnest(tag_ids) FROM recipes_recipe '
+                'WHERE tag_ids && %s::bigint[]', [tag_ids])
+            cursor.execute('ANALYZE recipes_recipe')
+            cursor.execute('ANALYZE recipes_recipe_tags')
+        return tags
+
+    def page(self, queryset):
+        return lambda: (list(queryset[:PAGE_SIZE]), queryset.count())
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            tags = self.seed(options)
+            recipes = Recipe.objects.order_by('-created_at').only('id')
+            for count in range(1, len(tags) + 1):
+                tag_ids = [tag.id for tag in tags[:count]]
+                slugs = [tag.slug for tag in tags[:count]]
+                timings = {
+                    'tag_ids && (любой)': self.page(
+                        recipes.filter(tag_ids__overlap=tag_ids)),
+                    'tag_ids @> (все)': self.page(
+                        recipes.filter(tag_ids__contains=tag_ids)),
+                    'join recipe_tags': self.page(
+                        recipes.filter(tags__slug__in=slugs).distinct()),
+                }
+                self.stdout.write(f'Тегов: {count}')
+                for name, func in timings.items():
+                    self.stdout.write(f'    {name}: ' + format_timing(
+                        measure(func, options['repeat'])))
+            transaction.set_rollback(True)
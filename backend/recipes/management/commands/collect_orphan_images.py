@@ -0,0 +1,46 @@
+import os
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from recipes.models import Recipe
+
+
+class Command(BaseCommand):
+    help = 'Удаляет файлы изображений, на которые не ссылается ни один рецепт'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--grace', type=int, default=settings.IMAGE_DELETE_GRACE,
+            help='Не удалять файлы моложе указанного числа секунд')
+        parser.add_argument(
+            '--dry-run', action='store_true',
+            help='Только вывести список файлов без удаления')
+
+    def walk(self, storage, path):
+        directories, files = storage.listdir(path)
+        for name in files:
+            yield os.path.join(path, name)
+        for directory in directories:
+            yield from self.walk(storage, os.path.join(path, directory))
+
+    def handle(self, *args, **options):
+        field = Recipe._meta.get_field('image')
+        storage = field.storage
+        if not storage.exists(field.upload_to):
+            return
+        referenced = set(
+            Recipe.objects.values_list('image', flat=True).iterator())
+        threshold = timezone.now() - timedelta(seconds=options['grace'])
+        deleted = 0
+        for name in self.walk(storage, field.upload_to):
+            if (name in referenced
+                    or storage.get_modified_time(name) > threshold):
+                continue
+            if not options['dry_run']:
+                storage.delete(name)
+            self.stdout.write(name)
+            deleted += 1
+        self.stdout.write(f'Найдено неиспользуемых файлов: {deleted}')
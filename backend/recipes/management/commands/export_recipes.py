@@ -0,0 +1,31 @@
+import sys
+
+from django.core.management.base import BaseCommand
+
+from recipes.export import EXPORT_CHUNK_SIZE, iter_ndjson
+
+
+class Command(BaseCommand):
+    help = 'Выгружает все рецепты в формате NDJSON'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '-o', '--output',
+            help='Файл для выгрузки (по умолчанию stdout)')
+        parser.add_argument(
+            '--gzip', action='store_true',
+            help='Сжать выгрузку gzip')
+        parser.add_argument(
+            '--chunk-size', type=int, default=EXPORT_CHUNK_SIZE,
+            help='Количество рецептов, загружаемых из БД за один раз')
+
+    def handle(self, *args, **options):
+        chunks = iter_ndjson(options['chunk_size'], options['gzip'])
+        if options['output'] is None:
+            for chunk in chunks:
+                sys.stdout.buffer.write(chunk)
+            sys.stdout.buffer.flush()
+            return
+        with open(options['output'], 'wb') as output:
+            for chunk in chunks:
+                output.write(chunk)
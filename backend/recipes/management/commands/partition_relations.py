@@ -0,0 +1,123 @@
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+
+from recipes.models import FavoriteRecipe, ShoppingCart
+
+OLD_SUFFIX = '_unpartitioned'
+
+
+class Command(BaseCommand):
+    help = ('Переводит избранное и списки покупок на таблицы, '
+            'секционированные по хешу user_id')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--partitions', type=int, default=16,
+            help='Количество секций')
+        parser.add_argument(
+            '--vacuum-scale-factor', type=float, default=0.05,
+            help='autovacuum_vacuum_scale_factor для каждой секции')
+        parser.add_argument(
+            '--drop-old', action='store_true',
+            help='Удалить исходные таблицы после переноса данных')
+        parser.add_argument(
+            '--dry-run', action='store_true',
+            help='Только вывести SQL без выполнения')
+
+    def is_partitioned(self, cursor, table):
+        cursor.execute(
+            'SELECT 1 FROM pg_partitioned_table '
+            'WHERE partrelid = %s::regclass', [table])
+        return cursor.fetchone() is not None
+
+    def plain_indexes(self, cursor, table):
+        cursor.execute(
+            'SELECT indexdef FROM pg_indexes WHERE tablename = %s '
+            'AND indexname NOT IN (SELECT conname FROM pg_constraint '
+            'WHERE conrelid = %s::regclass) ORDER BY indexname',
+            [table, table])
+        return [row[0] for row in cursor.fetchall()]
+
+    def partition_sql(self, model, indexes, options):
+        opts = model._meta
+        table = opts.db_table
+        old_table = table + OLD_SUFFIX
+        user_column = opts.get_field('user').column
+        columns = ', '.join(field.column for field in opts.concrete_fields)
+        statements = [
+            f'LOCK TABLE {table} IN ACCESS EXCLUSIVE MODE',
+            f'ALTER TABLE {table} RENAME TO {old_table}',
+            f"""
+            DO $$
+            DECLARE index_name text;
+            BEGIN
+                FOR index_name IN
+                    SELECT indexname FROM pg_indexes
+                    WHERE tablename = '{old_table}'
+                LOOP
+                    EXECUTE format('ALTER INDEX %I RENAME TO %I', index_name,
+                                   left(index_name, 49) || '{OLD_SUFFIX}');
+                END LOOP;
+            END $$
+            """,
+            f'CREATE TABLE {table} (LIKE {old_table} INCLUDING DEFAULTS) '
+            f'PARTITION BY HASH ({user_column})',
+            f'ALTER TABLE {table} ADD CONSTRAINT {table}_pkey '
+            f'PRIMARY KEY ({opts.pk.column}, {user_column})',
+        ]
+        for constraint in opts.constraints:
+            constraint_columns = ', '.join(
+                opts.get_field(name).column for name in constraint.fields)
+            statements.append(
+                f'ALTER TABLE {table} ADD CONSTRAINT {constraint.name} '
+                f'UNIQUE ({constraint_columns})')
+        statements.extend(indexes)
+        for field in opts.concrete_fields:
+            if field.remote_field is None:
+                continue
+            statements.append(
+                f'ALTER TABLE {table} '
+                f'ADD CONSTRAINT {table}_{field.column}_fk '
+                f'FOREIGN KEY ({field.column}) REFERENCES '
+                f'{field.related_model._meta.db_table} (id) '
+                f'ON DELETE CASCADE DEFERRABLE INITIALLY DEFERRED')
+        for remainder in range(options['partitions']):
+            statements.append(
+                f'CREATE TABLE {table}_p{remainder} PARTITION OF {table} '
+                f'FOR VALUES WITH (MODULUS {options["partitions"]}, '
+                f'REMAINDER {remainder}) WITH (autovacuum_vacuum_scale_factor'
+                f' = {options["vacuum_scale_factor"]})')
+        statements.extend([
+            f'INSERT INTO {table} ({columns}) '
+            f'SELECT {columns} FROM {old_table}',
+            f"""
+            DO $$
+            BEGIN
+                EXECUTE format('ALTER SEQUENCE %s OWNED BY {table}.id',
+                               pg_get_serial_sequence('{old_table}', 'id'));
+            END $$
+            """,
+            f'ANALYZE {table}',
+        ])
+        if options['drop_old']:
+            statements.append(f'DROP TABLE {old_table}')
+        return statements
+
+    def handle(self, *args, **options):
+        with connection.cursor() as cursor:
+            for model in (FavoriteRecipe, ShoppingCart):
+                table = model._meta.db_table
+                if self.is_partitioned(cursor, table):
+                    self.stdout.write(f'{table}: уже секционирована')
+                    continue
+                statements = self.partition_sql(
+                    model, self.plain_indexes(cursor, table), options)
+                if options['dry_run']:
+                    for statement in statements:
+                        self.stdout.write(statement.strip() + ';')
+                    continue
+                with transaction.atomic():
+                    for statement in statements:
+                        cursor.execute(statement)
+                self.stdout.write(
+                    f'{table}: {options["partitions"]} секций')
@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from recipes.popularity import rebuild_scores
+
+
+class Command(BaseCommand):
+    help = ('Пересчитывает популярность рецептов по избранному '
+            'и спискам покупок')
+
+    def handle(self, *args, **options):
+        rebuild_scores()
@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+
+from recipes.documents import refresh_documents
+from recipes.models import Recipe
+
+
+class Command(BaseCommand):
+    help = 'Пересобирает готовые представления рецептов'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--missing', action='store_true',
+            help='Только для рецептов без готового представления')
+
+    def handle(self, *args, **options):
+        recipes = Recipe.objects.order_by('id')
+        if options['missing']:
+            recipes = recipes.filter(document={})
+        refresh_documents(recipes.values_list('id', flat=True).iterator())
@@ -0,0 +1,33 @@
+# Generated by Django 3.2.6 on 2026-10-19 19:32
+
+import django.contrib.postgres.fields
+import django.contrib.postgres.indexes
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0002_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='recipe',
+            name='tag_ids',
+            field=django.contrib.postgres.fields.ArrayField(base_field=models.BigIntegerField(), blank=True, default=list, editable=False, size=None, verbose_name='Идентификаторы тегов'),
+        ),
+        migrations.RunSQL(
+            sql=(
+                "UPDATE recipes_recipe SET tag_ids = COALESCE(("
+                "SELECT array_agg(tag_id ORDER BY tag_id) "
+                "FROM recipes_recipe_tags "
+                "WHERE recipe_id = recipes_recipe.id), '{}')"
+            ),
+            reverse_sql=migrations.RunSQL.noop,
+        ),
+        migrations.AddIndex(
+            model_name='recipe',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['tag_ids'], name='recipe_tag_ids_gin'),
+        ),
+    ]
@@ -0,0 +1,55 @@
+# Generated by Django 3.2.6 on 2026-10-19 19:43
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+from foodgram.db import cascade_operations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0006_content_addressed_images'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PopularityEvent',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('favorite', 'Избранное'), ('shopping_cart', 'Список покупок')], max_length=20, verbose_name='Тип')),
+                ('sign', models.SmallIntegerField(verbose_name='Знак')),
+                ('occurred_at', models.DateTimeField(verbose_name='Дата события')),
+            ],
+            options={
+                'verbose_name': 'Событие популярности',
+                'verbose_name_plural': 'События популярности',
+                'ordering': ['id'],
+            },
+        ),
+        migrations.AddField(
+            model_name='recipe',
+            name='popularity_score',
+            field=models.FloatField(default=float("-inf"), editable=False, verbose_name='Популярность'),
+        ),
+        migrations.AddField(
+            model_name='recipe',
+            name='trending_score',
+            field=models.FloatField(default=float("-inf"), editable=False, verbose_name='Популярность за последнее время'),
+        ),
+        migrations.AddIndex(
+            model_name='recipe',
+            index=models.Index(fields=['-popularity_score', '-id'], name='recipe_popularity_id'),
+        ),
+        migrations.AddIndex(
+            model_name='recipe',
+            index=models.Index(fields=['-trending_score', '-id'], name='recipe_trending_id'),
+        ),
+        migrations.AddField(
+            model_name='popularityevent',
+            name='recipe',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to='recipes.recipe', verbose_name='Рецепт'),
+        ),
+    ] + cascade_operations((
+        ('recipes_popularityevent', 'recipe_id', 'recipes_recipe'),
+    ))
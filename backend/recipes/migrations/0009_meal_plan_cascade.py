@@ -0,0 +1,15 @@
+from django.db import migrations
+
+from foodgram.db import cascade_operations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0008_meal_plan'),
+    ]
+
+    operations = cascade_operations((
+        ('recipes_mealplanentry', 'user_id', 'users_user'),
+        ('recipes_mealplanentry', 'recipe_id', 'recipes_recipe'),
+    ))
@@ -1,8 +1,12 @@
 from colorfield.fields import ColorField
 from django.contrib.auth import get_user_model
+from django.contrib.postgres.fields import ArrayField
+from django.contrib.postgres.indexes import GinIndex
 from django.core.validators import MinValueValidator
 from django.db import models
 
+from recipes.storage import ContentAddressedStorage
+
 User = get_user_model()
 
 
@@ -46,25 +50,44 @@ class Ingredient(models.Model):
 
 class Recipe(models.Model):
     author = models.ForeignKey(
-        User, on_delete=models.CASCADE, related_name='recipes',
+        User, on_delete=models.DO_NOTHING, related_name='recipes',
         null=True, verbose_name='Автор')
     name = models.CharField(max_length=300, verbose_name='Название')
     image = models.ImageField(
-        upload_to='recipes/images', verbose_name='Изображение')
+        upload_to='recipes/images', storage=ContentAddressedStorage(),
+        verbose_name='Изображение')
     text = models.TextField(verbose_name='Описание')
     ingredients = models.ManyToManyField(
         Ingredient, through='RecipeIngredient', verbose_name='Ингредиенты')
     tags = models.ManyToManyField(Tag, verbose_name='Теги')
+    tag_ids = ArrayField(
+        models.BigIntegerField(), default=list, blank=True, editable=False,
+        verbose_name='Идентификаторы тегов')
     cooking_time = models.PositiveSmallIntegerField(
         validators=[MinValueValidator(1, 'Значение должно быть больше 1!')],
         verbose_name='Время приготовления')
     created_at = models.DateTimeField(
         auto_now_add=True, verbose_name='Дата создания')
+    document = models.JSONField(
+        default=dict, blank=True, editable=False,
+        verbose_name='Готовое представление')
+    popularity_score = models.FloatField(
+        default=float('-inf'), editable=False, verbose_name='Популярность')
+    trending_score = models.FloatField(
+        default=float('-inf'), editable=False,
+        verbose_name='Популярность за последнее время')
 
     class Meta:
         ordering = ['-created_at']
         verbose_name = 'Рецепт'
         verbose_name_plural = 'Рецепты'
+        indexes = [
+            GinIndex(fields=['tag_ids'], name='recipe_tag_ids_gin'),
+            models.Index(fields=['-popularity_score', '-id'],
+                         name='recipe_popularity_id'),
+            models.Index(fields=['-trending_score', '-id'],
+                         name='recipe_trending_id'),
+        ]
 
     def __str__(self):
         return self.name
@@ -77,9 +100,9 @@ class Recipe(models.Model):
 
 class RecipeIngredient(models.Model):
     recipe = models.ForeignKey(
-        Recipe, on_delete=models.CASCADE, verbose_name='Рецепт')
+        Recipe, on_delete=models.DO_NOTHING, verbose_name='Рецепт')
     ingredient = models.ForeignKey(
-        Ingredient, on_delete=models.CASCADE, verbose_name='Ингредиент')
+        Ingredient, on_delete=models.DO_NOTHING, verbose_name='Ингредиент')
     amount = models.PositiveIntegerField(
         validators=[MinValueValidator(1, 'Значение должно быть больше 1!')],
         verbose_name='Количество')
@@ -99,10 +122,10 @@ class RecipeIngredient(models.Model):
 
 class FavoriteRecipe(models.Model):
     user = models.ForeignKey(
-        User, on_delete=models.CASCADE, related_name='favorites',
+        User, on_delete=models.DO_NOTHING, related_name='favorites',
         verbose_name='Пользователь')
     recipe = models.ForeignKey(
-        Recipe, on_delete=models.CASCADE, related_name='favorites',
+        Recipe, on_delete=models.DO_NOTHING, related_name='favorites',
         verbose_name='Рецепт')
     created_at = models.DateTimeField(
         auto_now_add=True, verbose_name='Дата создания')
@@ -122,10 +145,10 @@ class FavoriteRecipe(models.Model):
 
 class ShoppingCart(models.Model):
     user = models.ForeignKey(
-        User, on_delete=models.CASCADE, related_name='shopping_cart',
+        User, on_delete=models.DO_NOTHING, related_name='shopping_cart',
         verbose_name='Пользователь')
     recipe = models.ForeignKey(
-        Recipe, on_delete=models.CASCADE,
+        Recipe, on_delete=models.DO_NOTHING,
         related_name='shopping_cart', verbose_name='Рецепт')
     created_at = models.DateTimeField(
         auto_now_add=True, verbose_name='Дата создания')
@@ -141,3 +164,53 @@ class ShoppingCart(models.Model):
 
     def __str__(self):
         return f'{self.user.username}: {self.recipe.name}'
+
+
+class MealPlanEntry(models.Model):
+    user = models.ForeignKey(
+        User, on_delete=models.DO_NOTHING, related_name='meal_plan',
+        verbose_name='Пользователь')
+    recipe = models.ForeignKey(
+        Recipe, on_delete=models.DO_NOTHING, related_name='meal_plan',
+        verbose_name='Рецепт')
+    date = models.DateField(verbose_name='Дата')
+    servings = models.PositiveSmallIntegerField(
+        default=1,
+        validators=[MinValueValidator(1, 'Значение должно быть больше 1!')],
+        verbose_name='Количество порций')
+
+    class Meta:
+        ordering = ['date', 'id']
+        verbose_name = 'План питания'
+        verbose_name_plural = 'План питания'
+        indexes = [
+            models.Index(fields=['user', 'date'], name='meal_plan_user_date')
+        ]
+
+    def __str__(self):
+        return f'{self.user.username}: {self.recipe.name} ({self.date})'
+
+
+class PopularityEvent(models.Model):
+    FAVORITE = 'favorite'
+    SHOPPING_CART = 'shopping_cart'
+    KINDS = (
+        (FAVORITE, 'Избранное'),
+        (SHOPPING_CART, 'Список покупок'),
+    )
+
+    recipe = models.ForeignKey(
+        Recipe, on_delete=models.DO_NOTHING, related_name='+',
+        verbose_name='Рецепт')
+    kind = models.CharField(max_length=20, choices=KINDS,
+                            verbose_name='Тип')
+    sign = models.SmallIntegerField(verbose_name='Знак')
+    occurred_at = models.DateTimeField(verbose_name='Дата события')
+
+    class Meta:
+        ordering = ['id']
+        verbose_name = 'Событие популярности'
+        verbose_name_plural = 'События популярности'
+
+    def __str__(self):
+        return f'{self.kind} {self.sign:+d}: {self.recipe_id}'
@@ -0,0 +1,93 @@
+import math
+from collections import defaultdict
+
+from django.conf import settings
+from django.db import transaction
+
+from recipes.documents import chunked
+from recipes.models import (FavoriteRecipe, PopularityEvent, Recipe,
+                            ShoppingCart)
+
+EMPTY_SCORE = float('-inf')
+EVENTS_BATCH_SIZE = 1000
+SCORE_PRECISION = 1e-9
+
+SCORES = {
+    'popularity_score': 'POPULARITY_HALF_LIFE',
+    'trending_score': 'TRENDING_HALF_LIFE',
+}
+
+
+def log_add(a, b):
+    if a == EMPTY_SCORE:
+        return b
+    if b == EMPTY_SCORE:
+        return a
+    high, low = max(a, b), min(a, b)
+    return high + math.log1p(math.exp(low - high))
+
+
+def log_subtract(a, b):
+    if b == EMPTY_SCORE:
+        return a
+    if a - b < SCORE_PRECISION:
+        return EMPTY_SCORE
+    return a + math.log1p(-math.exp(b - a))
+
+
+def event_log_weights(kind, occurred_at):
+    elapsed = (occurred_at - settings.POPULARITY_EPOCH).total_seconds()
+    weight = math.log(settings.POPULARITY_WEIGHTS[kind])
+    return {
+        field: weight + elapsed * math.log(2) / getattr(settings, half_life)
+        for field, half_life in SCORES.items()
+    }
+
+
+def apply_events(batch_size=EVENTS_BATCH_SIZE):
+    with transaction.atomic():
+        events = list(
+            PopularityEvent.objects.select_for_update(skip_locked=True)
+            .order_by('id')[:batch_size])
+        if not events:
+            return 0
+        added = defaultdict(lambda: dict.fromkeys(SCORES, EMPTY_SCORE))
+        removed = defaultdict(lambda: dict.fromkeys(SCORES, EMPTY_SCORE))
+        for event in events:
+            target = added if event.sign > 0 else removed
+            weights = event_log_weights(event.kind, event.occurred_at)
+            for field in SCORES:
+                target[event.recipe_id][field] = log_add(
+                    target[event.recipe_id][field], weights[field])
+        recipes = Recipe.objects.select_for_update().filter(
+            id__in=set(added) | set(removed)).order_by('id').only(
+                'id', *SCORES)
+        for recipe in recipes:
+            for field in SCORES:
+                score = log_add(getattr(recipe, field),
+                                added[recipe.id][field])
+                setattr(recipe, field,
+                        log_subtract(score, removed[recipe.id][field]))
+        Recipe.objects.bulk_update(recipes, list(SCORES))
+        PopularityEvent.objects.filter(
+            id__in=[event.id for event in events]).delete()
+    return len(events)
+
+
+def rebuild_scores(batch_size=EVENTS_BATCH_SIZE):
+    scores = defaultdict(lambda: dict.fromkeys(SCORES, EMPTY_SCORE))
+    for kind, model in ((PopularityEvent.FAVORITE, FavoriteRecipe),
+                        (PopularityEvent.SHOPPING_CART, ShoppingCart)):
+        for recipe_id, created_at in model.objects.values_list(
+                'recipe_id', 'created_at').iterator(chunk_size=batch_size):
+            weights = event_log_weights(kind, created_at)
+            for field in SCORES:
+                scores[recipe_id][field] = log_add(
+                    scores[recipe_id][field], weights[field])
+    with transaction.atomic():
+        PopularityEvent.objects.all().delete()
+        Recipe.objects.update(**dict.fromkeys(SCORES, EMPTY_SCORE))
+        for chunk in chunked(scores.items(), batch_size):
+            Recipe.objects.bulk_update(
+                [Recipe(id=recipe_id, **values)
+                 for recipe_id, values in chunk], list(SCORES))
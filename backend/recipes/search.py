@@ -0,0 +1,224 @@
+import json
+import logging
+import select
+import threading
+import time
+from array import array
+from bisect import bisect_left, insort
+from collections import Counter
+
+import psycopg2
+from django.conf import settings
+from django.db import connection, connections
+from psycopg2.extensions import ISOLATION_LEVEL_AUTOCOMMIT
+
+from recipes.models import Recipe, RecipeIngredient
+
+logger = logging.getLogger(__name__)
+
+
+class IngredientIndex:
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._built_at = None
+        self._postings = {}
+        self._recipes = {}
+        self._rebuilding = False
+        self._changed = None
+        self._listener = None
+        self._stopped = threading.Event()
+
+    def _load(self):
+        postings = {}
+        for ingredient_id, recipe_id in (
+                RecipeIngredient.objects.order_by(
+                    'ingredient_id', 'recipe_id').values_list(
+                        'ingredient_id', 'recipe_id').iterator()):
+            postings.setdefault(ingredient_id, array('q')).append(recipe_id)
+        recipe_ingredients = {}
+        for ingredient_id, recipe_ids in postings.items():
+            for recipe_id in recipe_ids:
+                recipe_ingredients.setdefault(
+                    recipe_id, array('q')).append(ingredient_id)
+        recipes = {}
+        for recipe_id, cooking_time, tag_ids in (
+                Recipe.objects.values_list(
+                    'id', 'cooking_time', 'tag_ids').iterator()):
+            recipes[recipe_id] = (
+                recipe_ingredients.get(recipe_id, array('q')),
+                cooking_time, frozenset(tag_ids))
+        return postings, recipes
+
+    def rebuild(self):
+        with self._lock:
+            self._changed = set()
+        try:
+            postings, recipes = self._load()
+        except Exception:
+            with self._lock:
+                self._changed = None
+            raise
+        with self._lock:
+            changed, self._changed = self._changed, None
+            self._postings = postings
+            self._recipes = recipes
+            self._built_at = time.monotonic()
+        if changed:
+            self.update_recipes(changed)
+
+    def _rebuild_in_background(self):
+        try:
+            self.rebuild()
+        except Exception:
+            logger.exception('Не удалось перестроить индекс ингредиентов')
+        finally:
+            self._rebuilding = False
+            connection.close()
+
+    def _ensure_built(self):
+        if self._built_at is None:
+            with self._lock:
+                if self._built_at is None:
+                    self.rebuild()
+        elif (time.monotonic() - self._built_at
+                > settings.INGREDIENT_INDEX_TTL):
+            with self._lock:
+                if self._rebuilding:
+                    return
+                self._rebuilding = True
+            threading.Thread(
+                target=self._rebuild_in_background, daemon=True).start()
+        self._start_listener()
+
+    def _start_listener(self):
+        if self._listener is not None or connection.vendor != 'postgresql':
+            return
+        with self._lock:
+            if self._listener is not None:
+                return
+            self._stopped.clear()
+            self._listener = threading.Thread(
+                target=self._listen, daemon=True)
+            self._listener.start()
+
+    def stop_listener(self):
+        with self._lock:
+            listener, self._listener = self._listener, None
+        if listener is not None:
+            self._stopped.set()
+            listener.join()
+
+    def _listen(self):
+        while not self._stopped.is_set():
+            try:
+                listener = psycopg2.connect(
+                    **connections['default'].get_connection_params())
+            except psycopg2.Error:
+                logger.exception('Не удалось подключиться к PostgreSQL')
+                self._stopped.wait(settings.EVENTS_RECONNECT_DELAY)
+                continue
+            try:
+                listener.set_isolation_level(ISOLATION_LEVEL_AUTOCOMMIT)
+                with listener.cursor() as cursor:
+                    cursor.execute(
+                        f'LISTEN {settings.RECIPE_EVENTS_CHANNEL}')
+                while not self._stopped.is_set():
+                    select.select(
+                        [listener], [], [], settings.EVENTS_HEARTBEAT)
+                    listener.poll()
+                    recipe_ids = set()
+                    while listener.notifies:
+                        try:
+                            event = json.loads(
+                                listener.notifies.pop(0).payload)
+                        except ValueError:
+                            continue
+                        recipe_ids.add(event.get('id'))
+                    recipe_ids.discard(None)
+                    if recipe_ids:
+                        self.update_recipes(recipe_ids)
+            except Exception:
+                logger.exception('Индекс ингредиентов потерял подписку '
+                                 'на изменения рецептов')
+            finally:
+                listener.close()
+                connection.close()
+            self._stopped.wait(settings.EVENTS_RECONNECT_DELAY)
+
+    def _remove(self, recipe_id):
+        entry = self._recipes.pop(recipe_id, None)
+        if entry is None:
+            return
+        for ingredient_id in entry[0]:
+            recipe_ids = self._postings.get(ingredient_id)
+            if recipe_ids is None:
+                continue
+            position = bisect_left(recipe_ids, recipe_id)
+            if (position < len(recipe_ids)
+                    and recipe_ids[position] == recipe_id):
+                del recipe_ids[position]
+
+    def update_recipes(self, recipe_ids):
+        if self._built_at is None and self._changed is None:
+            return
+        recipe_ids = set(recipe_ids)
+        ingredients = {}
+        for recipe_id, ingredient_id in (
+                RecipeIngredient.objects.filter(
+                    recipe_id__in=recipe_ids).order_by(
+                        'ingredient_id').values_list(
+                            'recipe_id', 'ingredient_id')):
+            ingredients.setdefault(
+                recipe_id, array('q')).append(ingredient_id)
+        recipes = {
+            recipe_id: (ingredients.get(recipe_id, array('q')),
+                        cooking_time, frozenset(tag_ids))
+            for recipe_id, cooking_time, tag_ids in
+            Recipe.objects.filter(id__in=recipe_ids).values_list(
+                'id', 'cooking_time', 'tag_ids')}
+        with self._lock:
+            if self._changed is not None:
+                self._changed.update(recipe_ids)
+            for recipe_id in recipe_ids:
+                self._remove(recipe_id)
+            for recipe_id, entry in recipes.items():
+                for ingredient_id in entry[0]:
+                    insort(self._postings.setdefault(
+                        ingredient_id, array('q')), recipe_id)
+                self._recipes[recipe_id] = entry
+
+    def update_recipe(self, recipe):
+        self.update_recipes([recipe.id])
+
+    def remove_recipe(self, recipe_id):
+        with self._lock:
+            if self._changed is not None:
+                self._changed.add(recipe_id)
+            self._remove(recipe_id)
+
+    def search(self, ingredient_ids, tag_ids=None, max_cooking_time=None):
+        self._ensure_built()
+        with self._lock:
+            matches = Counter()
+            for ingredient_id in set(ingredient_ids):
+                matches.update(self._postings.get(ingredient_id, ()))
+            if tag_ids is not None:
+                tag_ids = frozenset(tag_ids)
+            results = []
+            for recipe_id, matched in matches.items():
+                entry = self._recipes.get(recipe_id)
+                if entry is None:
+                    continue
+                ingredients, cooking_time, recipe_tag_ids = entry
+                if (tag_ids is not None
+                        and tag_ids.isdisjoint(recipe_tag_ids)):
+                    continue
+                if (max_cooking_time is not None
+                        and cooking_time > max_cooking_time):
+                    continue
+                results.append((recipe_id, matched / len(ingredients)))
+        results.sort(key=lambda result: (-result[1], -result[0]))
+        return results
+
+
+ingredient_index = IngredientIndex()
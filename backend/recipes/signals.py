@@ -0,0 +1,166 @@
+import json
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.postgres.aggregates import ArrayAgg
+from django.contrib.postgres.fields import ArrayField
+from django.db import connection, transaction
+from django.db.models import (BigIntegerField, F, Func, OuterRef, Subquery,
+                              Value)
+from django.db.models.functions import Coalesce
+from django.db.models.signals import (m2m_changed, post_delete, post_save,
+                                      pre_delete)
+from django.dispatch import receiver
+
+from jobs.queue import enqueue
+from recipes.models import (FavoriteRecipe, Ingredient, PopularityEvent,
+                            Recipe, RecipeIngredient, ShoppingCart, Tag)
+from recipes.search import ingredient_index
+from recipes.tasks import (delete_images_later, record_popularity_event,
+                           update_popularity_later)
+
+
+class ArrayRemove(Func):
+    function = 'array_remove'
+
+
+def sync_tag_ids(recipe_ids):
+    tag_ids = (Recipe.tags.through.objects
+               .filter(recipe_id=OuterRef('pk'))
+               .values('recipe_id')
+               .annotate(ids=ArrayAgg('tag_id', ordering='tag_id'))
+               .values('ids'))
+    Recipe.objects.filter(id__in=recipe_ids).update(tag_ids=Coalesce(
+        Subquery(tag_ids),
+        Value([], output_field=ArrayField(BigIntegerField()))))
+
+
+@receiver(m2m_changed, sender=Recipe.tags.through)
+def recipe_tags_changed(sender, instance, action, reverse, pk_set,
+                        **kwargs):
+    if not reverse:
+        if action in ('post_add', 'post_remove', 'post_clear'):
+            sync_tag_ids([instance.pk])
+        return
+    if action == 'pre_clear':
+        instance._cleared_recipe_ids = list(
+            instance.recipe_set.values_list('id', flat=True))
+    elif action == 'post_clear':
+        sync_tag_ids(getattr(instance, '_cleared_recipe_ids', []))
+    elif action in ('post_add', 'post_remove'):
+        sync_tag_ids(pk_set)
+
+
+@receiver(post_delete, sender=Tag)
+def tag_deleted(sender, instance, **kwargs):
+    recipes = Recipe.objects.filter(tag_ids__contains=[instance.pk])
+    recipe_ids = list(recipes.values_list('id', flat=True))
+    recipes.update(tag_ids=ArrayRemove(F('tag_ids'), Value(instance.pk)))
+    if recipe_ids:
+        enqueue('recipes.refresh_documents', {'recipe_ids': recipe_ids})
+
+
+@receiver(post_save, sender=Tag)
+def tag_saved(sender, instance, created, **kwargs):
+    if not created:
+        enqueue('recipes.refresh_documents', {'tag_id': instance.pk},
+                dedup_key=f'recipe_documents:tag:{instance.pk}')
+
+
+@receiver(post_save, sender=Ingredient)
+def ingredient_saved(sender, instance, created, **kwargs):
+    if not created:
+        enqueue('recipes.refresh_documents',
+                {'ingredient_id': instance.pk},
+                dedup_key=f'recipe_documents:ingredient:{instance.pk}')
+
+
+@receiver(pre_delete, sender=Ingredient)
+def ingredient_deleted(sender, instance, **kwargs):
+    recipe_ids = list(RecipeIngredient.objects.filter(
+        ingredient=instance).values_list('recipe_id', flat=True))
+    if recipe_ids:
+        enqueue('recipes.refresh_documents', {'recipe_ids': recipe_ids})
+
+
+@receiver(post_save, sender=get_user_model())
+def author_saved(sender, instance, created, update_fields, **kwargs):
+    if created or (update_fields is not None and not set(update_fields) & {
+            'email', 'username', 'first_name', 'last_name'}):
+        return
+    if not instance.recipes.exists():
+        return
+    enqueue('recipes.refresh_documents', {'author_id': instance.pk},
+            dedup_key=f'recipe_documents:author:{instance.pk}')
+
+
+@receiver(post_save, sender=Recipe)
+def recipe_saved(sender, instance, created, **kwargs):
+    if connection.vendor != 'postgresql':
+        return
+    payload = json.dumps({
+        'id': instance.pk,
+        'author': instance.author_id,
+        'event': 'created' if created else 'updated',
+    })
+    transaction.on_commit(lambda: notify_recipe_event(payload))
+
+
+def notify_recipe_event(payload):
+    with connection.cursor() as cursor:
+        cursor.execute('SELECT pg_notify(%s, %s)',
+                       [settings.RECIPE_EVENTS_CHANNEL, payload])
+
+
+@receiver(post_delete, sender=Recipe)
+def recipe_deleted(sender, instance, **kwargs):
+    ingredient_index.remove_recipe(instance.pk)
+    if connection.vendor == 'postgresql':
+        payload = json.dumps({'id': instance.pk, 'author': instance.author_id,
+                              'event': 'deleted'})
+        transaction.on_commit(lambda: notify_recipe_event(payload))
+    delete_images_later([instance.image.name])
+
+
+@receiver(pre_delete, sender=get_user_model())
+def author_deleted(sender, instance, **kwargs):
+    delete_images_later(list(Recipe.objects.filter(
+        author=instance).values_list('image', flat=True)))
+    recorded = 0
+    with connection.cursor() as cursor:
+        for model in (FavoriteRecipe, ShoppingCart):
+            cursor.execute(
+                f'INSERT INTO {PopularityEvent._meta.db_table} '
+                f'(recipe_id, kind, sign, occurred_at) '
+                f'SELECT relation.recipe_id, %s, -1, relation.created_at '
+                f'FROM {model._meta.db_table} AS relation '
+                f'JOIN {Recipe._meta.db_table} AS recipe '
+                f'ON recipe.id = relation.recipe_id '
+                f'WHERE relation.user_id = %s AND (recipe.author_id IS NULL '
+                f'OR recipe.author_id <> %s)',
+                [popularity_kind(model), instance.pk, instance.pk])
+            recorded += cursor.rowcount
+    if recorded:
+        update_popularity_later()
+
+
+@receiver(post_save, sender=FavoriteRecipe)
+@receiver(post_save, sender=ShoppingCart)
+def popularity_added(sender, instance, created, **kwargs):
+    if created:
+        record_popularity_event(
+            instance.recipe_id, popularity_kind(sender), 1,
+            instance.created_at)
+
+
+@receiver(post_delete, sender=FavoriteRecipe)
+@receiver(post_delete, sender=ShoppingCart)
+def popularity_removed(sender, instance, **kwargs):
+    record_popularity_event(
+        instance.recipe_id, popularity_kind(sender), -1, instance.created_at)
+
+
+def popularity_kind(sender):
+    if sender is FavoriteRecipe:
+        return PopularityEvent.FAVORITE
+    return PopularityEvent.SHOPPING_CART
@@ -0,0 +1,73 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from jobs.queue import enqueue, task
+from recipes.documents import refresh_documents
+from recipes.models import PopularityEvent, Recipe, RecipeIngredient
+from recipes.popularity import apply_events
+
+
+@task('recipes.refresh_documents')
+def refresh_documents_task(recipe_ids=None, tag_id=None, ingredient_id=None,
+                           author_id=None):
+    if recipe_ids is not None:
+        refresh_documents(recipe_ids)
+    if tag_id is not None:
+        refresh_documents(Recipe.objects.filter(
+            tag_ids__contains=[tag_id]).values_list(
+                'id', flat=True).iterator())
+    if ingredient_id is not None:
+        refresh_documents(RecipeIngredient.objects.filter(
+            ingredient_id=ingredient_id).values_list(
+                'recipe_id', flat=True).iterator())
+    if author_id is not None:
+        refresh_documents(Recipe.objects.filter(
+            author_id=author_id).values_list('id', flat=True).iterator())
+
+
+@task('recipes.delete_images')
+def delete_images(names):
+    referenced = set(Recipe.objects.filter(image__in=names).values_list(
+        'image', flat=True))
+    storage = Recipe._meta.get_field('image').storage
+    threshold = timezone.now() - timedelta(
+        seconds=settings.IMAGE_DELETE_GRACE)
+    recent = []
+    for name in set(names) - referenced:
+        if not storage.exists(name):
+            continue
+        if storage.get_modified_time(name) > threshold:
+            recent.append(name)
+            continue
+        storage.delete(name)
+    if recent:
+        enqueue('recipes.delete_images', {'names': recent},
+                delay=settings.IMAGE_DELETE_GRACE)
+
+
+@task('recipes.update_popularity')
+def update_popularity():
+    while apply_events():
+        pass
+
+
+def record_popularity_event(recipe_id, kind, sign, occurred_at):
+    PopularityEvent.objects.create(recipe_id=recipe_id, kind=kind, sign=sign,
+                                   occurred_at=occurred_at)
+    update_popularity_later()
+
+
+def update_popularity_later():
+    transaction.on_commit(lambda: enqueue(
+        'recipes.update_popularity', dedup_key='recipes:popularity',
+        delay=settings.POPULARITY_UPDATE_DELAY))
+
+
+def delete_images_later(names):
+    names = [name for name in names if name]
+    if names:
+        transaction.on_commit(
+            lambda: enqueue('recipes.delete_images', {'names': names}))
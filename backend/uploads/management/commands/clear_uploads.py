@@ -0,0 +1,17 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from uploads.models import ChunkedUpload
+
+
+class Command(BaseCommand):
+    help = 'Удаляет просроченные загрузки'
+
+    def handle(self, *args, **options):
+        deleted, _ = ChunkedUpload.objects.filter(
+            created_at__lt=timezone.now() - timedelta(
+                hours=settings.UPLOAD_EXPIRE_HOURS)).delete()
+        self.stdout.write(f'Удалено загрузок: {deleted}')
@@ -0,0 +1,32 @@
+import os
+import uuid
+
+from django.conf import settings
+from django.db import models
+
+
+class ChunkedUpload(models.Model):
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4,
+                          editable=False)
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL, on_delete=models.CASCADE,
+        related_name='uploads', verbose_name='Пользователь')
+    filename = models.CharField(max_length=255, verbose_name='Имя файла')
+    size = models.PositiveIntegerField(verbose_name='Размер')
+    offset = models.PositiveIntegerField(default=0, verbose_name='Загружено')
+    completed_at = models.DateTimeField(
+        null=True, blank=True, verbose_name='Дата завершения')
+    created_at = models.DateTimeField(
+        auto_now_add=True, verbose_name='Дата создания')
+
+    class Meta:
+        ordering = ['-created_at']
+        verbose_name = 'Загрузка'
+        verbose_name_plural = 'Загрузки'
+
+    def __str__(self):
+        return f'{self.filename} ({self.offset}/{self.size})'
+
+    @property
+    def path(self):
+        return os.path.join(settings.UPLOAD_TEMP_ROOT, str(self.id))
@@ -0,0 +1,12 @@
+import os
+
+from django.db.models.signals import post_delete
+from django.dispatch import receiver
+
+from uploads.models import ChunkedUpload
+
+
+@receiver(post_delete, sender=ChunkedUpload)
+def upload_deleted(sender, instance, **kwargs):
+    if os.path.exists(instance.path):
+        os.remove(instance.path)
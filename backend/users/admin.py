@@ -3,6 +3,7 @@ from django.contrib.auth.admin import UserAdmin
 
 from recipes.models import FavoriteRecipe, ShoppingCart
 from users.models import Subscription, User
+from users.tasks import delete_user_account
 
 
 class FavoriteInline(admin.TabularInline):
@@ -22,3 +23,10 @@ class SubscriptionInline(admin.TabularInline):
 class UserAdmin(UserAdmin):
     list_filter = ('email', 'username')
     inlines = [FavoriteInline, ShoppingCartInline, SubscriptionInline]
+
+    def delete_model(self, request, obj):
+        delete_user_account(obj)
+
+    def delete_queryset(self, request, queryset):
+        for user in queryset:
+            delete_user_account(user)
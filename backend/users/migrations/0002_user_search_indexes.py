@@ -0,0 +1,26 @@
+# Generated by Django 3.2.6 on 2026-10-19 19:36
+
+from django.db import migrations, models
+
+SEARCH_FIELDS = ('username', 'first_name', 'last_name')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='user',
+            index=models.Index(fields=['-date_joined', '-id'], name='user_date_joined_id'),
+        ),
+    ] + [
+        migrations.RunSQL(
+            sql=(f'CREATE INDEX user_{field}_upper_prefix ON users_user '
+                 f'(UPPER({field}::text) text_pattern_ops)'),
+            reverse_sql=f'DROP INDEX user_{field}_upper_prefix',
+        )
+        for field in SEARCH_FIELDS
+    ]
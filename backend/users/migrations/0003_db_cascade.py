@@ -0,0 +1,32 @@
+# Generated by Django 3.2.6 on 2026-10-19 19:39
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+from foodgram.db import cascade_operations
+
+FOREIGN_KEYS = (
+    ('users_subscription', 'subscriber_id', 'users_user'),
+    ('users_subscription', 'author_id', 'users_user'),
+)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0002_user_search_indexes'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='subscription',
+            name='author',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.DO_NOTHING, related_name='subscribing', to=settings.AUTH_USER_MODEL, verbose_name='Автор'),
+        ),
+        migrations.AlterField(
+            model_name='subscription',
+            name='subscriber',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.DO_NOTHING, related_name='subscriber', to=settings.AUTH_USER_MODEL, verbose_name='Подписчик'),
+        ),
+    ] + cascade_operations(FOREIGN_KEYS)
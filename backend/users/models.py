@@ -21,13 +21,17 @@ class User(AbstractUser):
         ordering = ['-date_joined']
         verbose_name = 'Пользователь'
         verbose_name_plural = 'Пользователи'
+        indexes = [
+            models.Index(fields=['-date_joined', '-id'],
+                         name='user_date_joined_id')
+        ]
 
 
 class Subscription(models.Model):
-    subscriber = models.ForeignKey(User, on_delete=models.CASCADE,
+    subscriber = models.ForeignKey(User, on_delete=models.DO_NOTHING,
                                    related_name='subscriber',
                                    verbose_name='Подписчик')
-    author = models.ForeignKey(User, on_delete=models.CASCADE,
+    author = models.ForeignKey(User, on_delete=models.DO_NOTHING,
                                related_name='subscribing',
                                verbose_name='Автор')
     created_at = models.DateTimeField(
@@ -0,0 +1,31 @@
+from django.conf import settings
+
+from jobs.queue import enqueue, task
+from users.models import User
+
+
+@task('users.delete_user')
+def delete_user(user_id):
+    User.objects.filter(id=user_id).delete()
+
+
+def is_large_account(user):
+    limit = settings.USER_SYNC_DELETE_MAX_ROWS
+    rows = 0
+    for queryset in (user.recipes.all(), user.favorites.all(),
+                     user.shopping_cart.all(), user.meal_plan.all(),
+                     user.subscriber.all(), user.subscribing.all()):
+        rows += queryset.order_by()[:limit + 1 - rows].count()
+        if rows > limit:
+            return True
+    return False
+
+
+def delete_user_account(user):
+    if not is_large_account(user):
+        user.delete()
+        return
+    user.is_active = False
+    user.save(update_fields=['is_active'])
+    enqueue('users.delete_user', {'user_id': user.pk},
+            dedup_key=f'delete_user:{user.pk}')
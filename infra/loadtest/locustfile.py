@@ -0,0 +1,38 @@
+import os
+import random
+
+from locust import HttpUser, between, task
+
+
+class ReaderUser(HttpUser):
+    wait_time = between(0.5, 2)
+
+    def on_start(self):
+        token = os.environ.get('LOADTEST_TOKEN')
+        if token:
+            self.client.headers['Authorization'] = f'Token {token}'
+        response = self.client.get('/api/recipes/?limit=50',
+                                   name='/api/recipes/')
+        self.recipe_ids = [
+            recipe['id'] for recipe in response.json().get('results', [])]
+
+    @task(4)
+    def recipes(self):
+        self.client.get(f'/api/recipes/?page={random.randint(1, 5)}',
+                        name='/api/recipes/')
+
+    @task(3)
+    def recipe(self):
+        if self.recipe_ids:
+            self.client.get(
+                f'/api/recipes/{random.choice(self.recipe_ids)}/',
+                name='/api/recipes/{id}/')
+
+    @task(1)
+    def tags(self):
+        self.client.get('/api/tags/')
+
+    @task(1)
+    def ingredients(self):
+        self.client.get('/api/ingredients/?name=' + random.choice('абвгкмс'),
+                        name='/api/ingredients/?name=')
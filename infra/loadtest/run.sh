@@ -0,0 +1,53 @@
+#!/bin/sh
+# Сравнивает пропускную способность и память backend на WSGI и ASGI.
+# Запускать из infra/ при поднятом docker-compose:
+#   USERS=200 DURATION=2m sh loadtest/run.sh
+set -e
+cd "$(dirname "$0")/.."
+
+USERS=${USERS:-200}
+SPAWN_RATE=${SPAWN_RATE:-20}
+DURATION=${DURATION:-2m}
+HOST=${HOST:-http://localhost}
+LOCUST_IMAGE=${LOCUST_IMAGE:-locustio/locust:2.8.6}
+RESULTS=loadtest/results
+
+memory_kib() {
+    docker stats --no-stream --format '{{.MemUsage}}' "$1" | awk '{
+        value = $1; unit = $1
+        gsub(/[0-9.]/, "", unit); gsub(/[^0-9.]/, "", value)
+        scale = unit == "GiB" ? 1048576 : unit == "MiB" ? 1024 : unit == "KiB" ? 1 : 1 / 1024
+        printf "%d\n", value * scale
+    }'
+}
+
+mkdir -p "$RESULTS"
+for mode in wsgi asgi; do
+    files="-f docker-compose.yml"
+    if [ "$mode" = asgi ]; then
+        files="$files -f loadtest/docker-compose.asgi.yml"
+    fi
+    docker-compose $files up -d --force-recreate backend
+    sleep 10
+    container=$(docker-compose $files ps -q backend)
+    idle=$(memory_kib "$container")
+    peak=$idle
+    docker run --rm --network host -e LOADTEST_TOKEN \
+        -v "$PWD/loadtest:/mnt/locust" "$LOCUST_IMAGE" \
+        -f /mnt/locust/locustfile.py --headless --only-summary \
+        --host "$HOST" -u "$USERS" -r "$SPAWN_RATE" -t "$DURATION" \
+        --csv "/mnt/locust/results/$mode" &
+    locust=$!
+    while kill -0 "$locust" 2>/dev/null; do
+        current=$(memory_kib "$container")
+        [ "$current" -gt "$peak" ] && peak=$current
+        sleep 5
+    done
+    wait "$locust" || true
+    awk -F, -v mode="$mode" -v idle="$idle" -v peak="$peak" \
+        -v users="$USERS" '$2 == "Aggregated" {
+        printf "%s: %.1f запросов/с, p95 %s мс, ошибок %s, память %d МиБ -> %d МиБ, %.1f КиБ на соединение\n",
+            mode, $10, $17, $4, idle / 1024, peak / 1024, (peak - idle) / users
+    }' "$RESULTS/${mode}_stats.csv" | tee -a "$RESULTS/summary.txt"
+done
+docker-compose up -d --force-recreate backend